@@ -0,0 +1,79 @@
+"""embedding vectors as pgvector
+
+Revision ID: 7c2e4a91b0d5
+Revises: d3119bcccbab
+Create Date: 2026-10-18 14:05:12.402913
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "7c2e4a91b0d5"
+down_revision: Union[str, None] = "d3119bcccbab"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows converted per statement; each batch commits on its own so the backfill
+# never holds locks on, or a transaction over, the whole table.
+BATCH_SIZE = 1000
+# The column is unconstrained so several embedding models can share it, and
+# each model's dimension gets its own partial HNSW index. pgvector cannot
+# index more than 2000 dimensions, so llama3's 4096-dim vectors are searched
+# exactly.
+INDEXED_DIMS = (384, 768, 1024)
+
+
+def _backfill(target: str, expression: str) -> None:
+    """Fill ``target`` from ``expression`` in keyset-ordered batches."""
+    if op.get_context().as_sql:
+        # Offline scripts cannot loop on results; convert in one statement.
+        op.execute(f"UPDATE embedding AS e SET {target} = {expression}")
+        return
+    conn = op.get_bind()
+    statement = sa.text(
+        f"""
+        WITH batch AS (
+            SELECT id FROM embedding WHERE id > :after ORDER BY id LIMIT :size
+        )
+        UPDATE embedding AS e SET {target} = {expression}
+        FROM batch WHERE e.id = batch.id
+        RETURNING e.id
+        """
+    )
+    after = "00000000-0000-0000-0000-000000000000"
+    while True:
+        ids = conn.execute(statement, {"after": after, "size": BATCH_SIZE}).scalars()
+        last = max(ids, default=None)
+        if last is None:
+            break
+        after = str(last)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.execute("ALTER TABLE embedding ADD COLUMN vector_new vector")
+    with op.get_context().autocommit_block():
+        _backfill("vector_new", "e.vector::real[]::vector")
+    op.drop_column("embedding", "vector")
+    op.alter_column("embedding", "vector_new", new_column_name="vector")
+    with op.get_context().autocommit_block():
+        for dim in INDEXED_DIMS:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_embedding_vector_{dim} "
+                f"ON embedding USING hnsw ((vector::vector({dim})) vector_cosine_ops) "
+                f"WHERE vector_dims(vector) = {dim}"
+            )
+
+
+def downgrade() -> None:
+    op.add_column("embedding", sa.Column("vector_old", postgresql.ARRAY(sa.Float())))
+    with op.get_context().autocommit_block():
+        _backfill("vector_old", "e.vector::real[]")
+    # Dropping the column drops its indexes with it.
+    op.drop_column("embedding", "vector")
+    op.alter_column("embedding", "vector_old", new_column_name="vector")
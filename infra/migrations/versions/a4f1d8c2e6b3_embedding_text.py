@@ -0,0 +1,42 @@
+"""embedding chunk text and knowledge_doc tenant index
+
+Revision ID: a4f1d8c2e6b3
+Revises: 7c2e4a91b0d5
+Create Date: 2026-10-18 16:40:27.118730
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a4f1d8c2e6b3"
+down_revision: Union[str, None] = "7c2e4a91b0d5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # pgvector search results carry the chunk text, as Qdrant payloads do.
+    op.add_column("embedding", sa.Column("text", sa.Text()))
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_knowledge_doc_tenant_model",
+            "knowledge_doc",
+            ["tenant_id", "embedding_model"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_knowledge_doc_tenant_model",
+            table_name="knowledge_doc",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("embedding", "text")
@@ -0,0 +1,69 @@
+"""tenant-scoped composite indexes
+
+Revision ID: b8d3f5a7c9e1
+Revises: a4f1d8c2e6b3
+Create Date: 2026-10-18 18:21:03.554170
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b8d3f5a7c9e1"
+down_revision: Union[str, None] = "a4f1d8c2e6b3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns, unique)
+INDEXES = [
+    # Ticket queues: a tenant's tickets in a status, by priority then age.
+    (
+        "ix_ticket_tenant_status_priority_created",
+        "ticket",
+        ["tenant_id", "status", "priority", "created_at"],
+        False,
+    ),
+    # A user's chat sessions, newest first.
+    (
+        "ix_chat_session_tenant_user_created",
+        "chat_session",
+        ["tenant_id", "user_id", "created_at"],
+        False,
+    ),
+    # Documents by content; load_docs records each file once per tenant.
+    (
+        "uq_knowledge_doc_tenant_checksum",
+        "knowledge_doc",
+        ["tenant_id", "checksum"],
+        True,
+    ),
+    # A document's chunks in order.
+    ("ix_embedding_doc_chunk", "embedding", ["doc_id", "chunk_index"], False),
+]
+
+
+def upgrade() -> None:
+    # Built concurrently so writes to the tables continue meanwhile.
+    with op.get_context().autocommit_block():
+        for name, table, columns, unique in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=unique,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
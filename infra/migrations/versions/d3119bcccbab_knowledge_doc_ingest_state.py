@@ -0,0 +1,28 @@
+"""knowledge_doc ingest state
+
+Revision ID: d3119bcccbab
+Revises: 5bcf960eb735
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d3119bcccbab"
+down_revision: Union[str, None] = "5bcf960eb735"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("knowledge_doc", sa.Column("chunk_count", sa.Integer()))
+    op.add_column("knowledge_doc", sa.Column("embedding_model", sa.String(length=100)))
+
+
+def downgrade() -> None:
+    op.drop_column("knowledge_doc", "embedding_model")
+    op.drop_column("knowledge_doc", "chunk_count")
@@ -0,0 +1,38 @@
+"""per-store document ingest state
+
+Revision ID: e2a6c4b8d0f3
+Revises: b8d3f5a7c9e1
+Create Date: 2026-10-18 21:07:44.730512
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "e2a6c4b8d0f3"
+down_revision: Union[str, None] = "b8d3f5a7c9e1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Starts empty: the first load into each store re-embeds its documents,
+    # replacing the versions knowledge_doc last recorded.
+    op.create_table(
+        "stored_doc",
+        sa.Column("doc_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("store", sa.String(length=20), nullable=False),
+        sa.Column("checksum", sa.String(length=64), nullable=False),
+        sa.Column("chunk_count", sa.Integer(), nullable=False),
+        sa.Column("embedding_model", sa.String(length=100), nullable=False),
+        sa.PrimaryKeyConstraint("doc_id", "store"),
+        sa.ForeignKeyConstraint(["doc_id"], ["knowledge_doc.id"], ondelete="CASCADE"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("stored_doc")
@@ -0,0 +1,57 @@
+"""embedding document version
+
+Revision ID: f4b8d2e6a0c5
+Revises: e2a6c4b8d0f3
+Create Date: 2026-10-19 10:14:52.601237
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f4b8d2e6a0c5"
+down_revision: Union[str, None] = "e2a6c4b8d0f3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rows updated per statement, each batch committing on its own.
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    # The checksum of the document version each chunk was embedded from, so a
+    # changed document's new chunks can be written next to its old ones.
+    op.add_column("embedding", sa.Column("checksum", sa.String(length=64)))
+    fill = """
+        WITH batch AS (
+            SELECT id FROM embedding WHERE id > :after ORDER BY id LIMIT :size
+        )
+        UPDATE embedding AS e SET checksum = d.checksum
+        FROM batch, knowledge_doc AS d
+        WHERE e.id = batch.id AND d.id = e.doc_id
+        RETURNING e.id
+    """
+    if op.get_context().as_sql:
+        op.execute(
+            "UPDATE embedding AS e SET checksum = d.checksum "
+            "FROM knowledge_doc AS d WHERE d.id = e.doc_id"
+        )
+        return
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        after = "00000000-0000-0000-0000-000000000000"
+        while True:
+            ids = conn.execute(
+                sa.text(fill), {"after": after, "size": BATCH_SIZE}
+            ).scalars()
+            last = max(ids, default=None)
+            if last is None:
+                break
+            after = str(last)
+
+
+def downgrade() -> None:
+    op.drop_column("embedding", "checksum")
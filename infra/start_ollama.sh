@@ -25,9 +25,14 @@ if [ "$retries" -eq 0 ]; then
     exit 1
 fi
 
-# Pull the model.
+# Pull the chat model and the embedding model.
 echo "Pulling llama3 model (this may take a few minutes)..."
 ollama pull llama3
+embed_model="${EMBED_MODEL:-nomic-embed-text}"
+if [ "$embed_model" != "llama3" ]; then
+    echo "Pulling $embed_model embedding model..."
+    ollama pull "$embed_model"
+fi
 echo "Model pull complete."
 
 # Bring the server process to the foreground.
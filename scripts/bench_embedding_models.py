@@ -0,0 +1,102 @@
+"""Compare embedding models on throughput, query latency and recall@5.
+
+Each model is loaded into its own collection (side by side, as during a
+re-embed migration), then the questions in ``tests/knowledge/qa_pairs.json``
+are searched with dense-only and hybrid retrieval. Throughput is measured by
+embedding the demo corpus's chunks with the embedding cache disabled.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from qdrant_client import QdrantClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from helpdesk_ai.collection import search  # noqa: E402
+from helpdesk_ai.llm.embedding_models import get_model  # noqa: E402
+from helpdesk_ai.llm.ollama_client import OllamaClient  # noqa: E402
+from scripts.load_docs import _chunks, _load_text, load_manifest  # noqa: E402
+
+QA_PAIRS = Path("tests/knowledge/qa_pairs.json")
+DEFAULT_MODELS = ["nomic-embed-text", "llama3"]
+
+
+def _recall(
+    client: QdrantClient, name: str, tenant_id: str, pairs, vectors, hybrid: bool
+) -> float:
+    hits = 0
+    for pair, vector in zip(pairs, vectors):
+        result = search(
+            client,
+            vector,
+            tenant_id,
+            text=pair["question"] if hybrid else None,
+            limit=5,
+            name=name,
+        )
+        if any(pair["doc"] in p.payload.get("text", "") for p in result):
+            hits += 1
+    return hits / len(pairs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("models", nargs="*", default=DEFAULT_MODELS)
+    parser.add_argument("--manifest", type=Path, default=Path("scripts/demo_docs.json"))
+    parser.add_argument(
+        "--seed-manifest", type=Path, default=Path("scripts/seed_manifest.json")
+    )
+    args = parser.parse_args()
+
+    with open(args.seed_manifest) as f:
+        tenant_map = json.load(f)["tenants"]
+    tenant_id = list(tenant_map.values())[0]
+    with open(args.manifest) as f:
+        chunks = [
+            c
+            for entry in json.load(f)
+            for c in _chunks(_load_text(Path(entry["path"])))
+        ]
+    pairs = json.load(open(QA_PAIRS))
+    qdrant = QdrantClient(url="http://localhost:6333")
+    uncached = OllamaClient(use_cache=False)
+
+    print(
+        f"{'model':<20} {'dims':>5} {'chunks/s':>9} {'query ms':>9} "
+        f"{'dense@5':>8} {'hybrid@5':>8}"
+    )
+    for name in args.models:
+        model = get_model(name)
+        uncached.embed(model.query("warm up"), model=model.name)
+        start = time.perf_counter()
+        uncached.embed_many([model.document(c) for c in chunks], model=model.name)
+        throughput = len(chunks) / (time.perf_counter() - start)
+
+        latencies = []
+        vectors = []
+        for pair in pairs:
+            start = time.perf_counter()
+            vectors.append(
+                uncached.embed(model.query(pair["question"]), model=model.name)
+            )
+            latencies.append(time.perf_counter() - start)
+
+        load_manifest(args.manifest, tenant_map, incremental=False, model=model)
+        dense = _recall(qdrant, model.collection, tenant_id, pairs, vectors, False)
+        hybrid = _recall(qdrant, model.collection, tenant_id, pairs, vectors, True)
+        print(
+            f"{model.name:<20} {model.dimensions:>5} {throughput:>9.1f} "
+            f"{statistics.median(latencies) * 1000:>9.1f} {dense:>8.0%} {hybrid:>8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Compare memory, latency and recall@5 of the docs collection's storage modes.
+
+Points are copied from the ``docs`` collection into one scratch collection per
+mode, then every question in ``tests/knowledge/qa_pairs.json`` is searched in
+each with a few oversampling/rescore settings. Run ``scripts/load_docs.py``
+first (or pass ``--load``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import CollectionStatus, PointStruct
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from helpdesk_ai.collection import (  # noqa: E402
+    DEFAULT_COLLECTION,
+    VECTOR_SIZE,
+    ensure_collection,
+    search,
+)
+from helpdesk_ai.llm.ollama_client import OllamaClient  # noqa: E402
+
+QA_PAIRS = Path("tests/knowledge/qa_pairs.json")
+# (quantization, originals on disk)
+MODES = [("none", False), ("scalar", True), ("binary", True)]
+# (oversampling, rescore); ignored for unquantized collections.
+QUERY_SETTINGS = [(1.0, False), (2.0, True), (4.0, True)]
+REPEATS = 5
+
+
+def _ram_bytes(points: int, quantization: str, on_disk: bool) -> int:
+    """Vector bytes Qdrant keeps resident, ignoring the HNSW graph."""
+    originals = 0 if on_disk else points * VECTOR_SIZE * 4
+    quantized = {"none": 0, "scalar": VECTOR_SIZE, "binary": VECTOR_SIZE // 8}
+    return originals + points * quantized[quantization]
+
+
+def _copy(client: QdrantClient, source: str, target: str) -> int:
+    copied = 0
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            source, limit=256, offset=offset, with_vectors=True, with_payload=True
+        )
+        client.upsert(
+            target,
+            points=[
+                PointStruct(id=r.id, vector=r.vector, payload=r.payload)
+                for r in records
+            ],
+            wait=True,
+        )
+        copied += len(records)
+        if offset is None:
+            return copied
+
+
+def _wait_green(client: QdrantClient, name: str, timeout: float = 300) -> None:
+    deadline = time.monotonic() + timeout
+    while client.get_collection(name).status != CollectionStatus.GREEN:
+        if time.monotonic() > deadline:
+            raise SystemExit(f"{name} still optimizing after {timeout:.0f}s")
+        time.sleep(1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--seed-manifest", type=Path, default=Path("scripts/seed_manifest.json")
+    )
+    parser.add_argument(
+        "--load", action="store_true", help="run load_docs on the demo docs first"
+    )
+    parser.add_argument("--keep", action="store_true", help="keep scratch collections")
+    args = parser.parse_args()
+
+    with open(args.seed_manifest) as f:
+        tenant_map = json.load(f)["tenants"]
+    tenant_id = list(tenant_map.values())[0]
+    if args.load:
+        from scripts.load_docs import load_manifest
+
+        load_manifest(Path("scripts/demo_docs.json"), tenant_map)
+
+    pairs = json.load(open(QA_PAIRS))
+    ollama = OllamaClient()
+    vectors = ollama.embed_many([p["question"] for p in pairs])
+    client = QdrantClient(url="http://localhost:6333")
+
+    print(
+        f"{'mode':<16} {'oversample':>10} {'rescore':>7} {'RAM MB':>8} "
+        f"{'p50 ms':>7} {'p95 ms':>7} {'recall@5':>8}"
+    )
+    for quantization, on_disk in MODES:
+        name = f"{DEFAULT_COLLECTION}_bench_{quantization}"
+        if client.collection_exists(name):
+            client.delete_collection(name)
+        ensure_collection(client, name, quantization=quantization, on_disk=on_disk)
+        try:
+            count = _copy(client, DEFAULT_COLLECTION, name)
+            _wait_green(client, name)
+            ram = _ram_bytes(count, quantization, on_disk) / 1024**2
+            settings = QUERY_SETTINGS if quantization != "none" else [(None, None)]
+            for oversampling, rescore in settings:
+                latencies = []
+                hits = 0
+                for pair, vector in zip(pairs, vectors):
+                    for _ in range(REPEATS):
+                        start = time.perf_counter()
+                        result = search(
+                            client,
+                            vector,
+                            tenant_id,
+                            limit=5,
+                            name=name,
+                            quantization=quantization,
+                            oversampling=oversampling,
+                            rescore=rescore,
+                        )
+                        latencies.append(time.perf_counter() - start)
+                    if any(pair["doc"] in p.payload.get("text", "") for p in result):
+                        hits += 1
+                latencies.sort()
+                p95 = latencies[int(0.95 * (len(latencies) - 1))]
+                print(
+                    f"{quantization + (' (disk)' if on_disk else ''):<16} "
+                    f"{oversampling or '-':>10} {str(rescore or '-'):>7} "
+                    f"{ram:>8.1f} {statistics.median(latencies) * 1000:>7.1f} "
+                    f"{p95 * 1000:>7.1f} {hits / len(pairs):>8.0%}"
+                )
+        finally:
+            if not args.keep:
+                client.delete_collection(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Compare vector stores on search latency and recall@5.
+
+The demo corpus is loaded into every store (see ``helpdesk_ai.vector_store``),
+then each question in ``tests/knowledge/qa_pairs.json`` is searched dense-only
+in each of them with the same query vectors. Qdrant is also measured with
+hybrid retrieval, which pgvector does not offer.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from helpdesk_ai.llm.embedding_models import get_model  # noqa: E402
+from helpdesk_ai.llm.ollama_client import OllamaClient  # noqa: E402
+from helpdesk_ai.vector_store import STORES, VectorStore, open_store  # noqa: E402
+from scripts.load_docs import DATABASE_URL, load_manifest  # noqa: E402
+
+QA_PAIRS = Path("tests/knowledge/qa_pairs.json")
+REPEATS = 5
+
+
+def _measure(
+    store: VectorStore, tenant_id: str, pairs, vectors, hybrid: bool
+) -> tuple[float, float, float]:
+    """Median and p95 latency in seconds, and recall@5."""
+    latencies = []
+    hits = 0
+    for pair, vector in zip(pairs, vectors):
+        text = pair["question"] if hybrid else None
+        for _ in range(REPEATS):
+            start = time.perf_counter()
+            result = store.search(vector, tenant_id, text=text, limit=5)
+            latencies.append(time.perf_counter() - start)
+        if any(pair["doc"] in hit.text for hit in result):
+            hits += 1
+    latencies.sort()
+    p95 = latencies[int(0.95 * (len(latencies) - 1))]
+    return statistics.median(latencies), p95, hits / len(pairs)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("stores", nargs="*", default=list(STORES))
+    parser.add_argument("--manifest", type=Path, default=Path("scripts/demo_docs.json"))
+    parser.add_argument(
+        "--seed-manifest", type=Path, default=Path("scripts/seed_manifest.json")
+    )
+    parser.add_argument("--model", default=None, help="embedding model")
+    parser.add_argument(
+        "--no-load", action="store_true", help="search what the stores already hold"
+    )
+    args = parser.parse_args()
+
+    with open(args.seed_manifest) as f:
+        tenant_map = json.load(f)["tenants"]
+    tenant_id = list(tenant_map.values())[0]
+    model = get_model(args.model)
+    pairs = json.load(open(QA_PAIRS))
+    vectors = OllamaClient().embed_many(
+        [model.query(p["question"]) for p in pairs], model=model.name
+    )
+    engine = create_engine(DATABASE_URL)
+
+    print(f"{'store':<18} {'p50 ms':>7} {'p95 ms':>7} {'recall@5':>8}")
+    for kind in args.stores:
+        if not args.no_load:
+            load_manifest(args.manifest, tenant_map, model=model, store=kind)
+        with open_store(kind, model, engine=engine) as store:
+            modes = [False, True] if kind == "qdrant" else [False]
+            for hybrid in modes:
+                p50, p95, recall = _measure(store, tenant_id, pairs, vectors, hybrid)
+                label = kind + (" (hybrid)" if hybrid else "")
+                print(
+                    f"{label:<18} {p50 * 1000:>7.1f} {p95 * 1000:>7.1f} {recall:>8.0%}"
+                )
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import os
+from typing import Any, Sequence
+
+from qdrant_client import AsyncQdrantClient, QdrantClient
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Disabled,
+    Distance,
+    FieldCondition,
+    Filter,
+    Fusion,
+    FusionQuery,
+    HnswConfigDiff,
+    KeywordIndexParams,
+    KeywordIndexType,
+    MatchAny,
+    MatchValue,
+    Modifier,
+    PayloadIndexInfo,
+    PayloadSchemaType,
+    Prefetch,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    ScoredPoint,
+    SearchParams,
+    SparseVectorParams,
+    VectorParams,
+    VectorParamsDiff,
+)
+
+from helpdesk_ai.lexical import query_vector
+from helpdesk_ai.llm.embedding_models import EMBEDDING_MODEL, EmbeddingModel
+
+DEFAULT_COLLECTION = EMBEDDING_MODEL.collection
+VECTOR_SIZE = EMBEDDING_MODEL.dimensions
+QUANTIZATION_KINDS = ("none", "scalar", "binary")
+# ``scalar`` keeps an int8 copy of every vector in RAM (4x smaller than
+# float32), ``binary`` one bit per dimension (32x smaller). Originals stay in
+# mmap'd segments on disk and are only read to rescore the top candidates.
+QUANTIZATION = os.getenv("QDRANT_QUANTIZATION", "scalar").lower()
+VECTORS_ON_DISK = os.getenv("QDRANT_VECTORS_ON_DISK", "1").lower() not in {
+    "0",
+    "false",
+    "no",
+}
+# Candidates fetched per requested result before rescoring with originals.
+OVERSAMPLING = {"none": None, "scalar": 2.0, "binary": 3.0}
+# BM25 term weights (see :mod:`helpdesk_ai.lexical`) live next to the dense
+# vector under this name; Qdrant supplies the IDF factor at query time.
+SPARSE_VECTOR = "bm25"
+SPARSE_CONFIG = {SPARSE_VECTOR: SparseVectorParams(modifier=Modifier.IDF)}
+# Candidates each retriever contributes, per requested result, to the fusion.
+HYBRID_PREFETCH = 4
+
+# Every query filters on ``tenant_id``, so the collection is laid out for
+# multitenancy: no global HNSW graph (``m=0``) and a per-tenant graph built
+# from the ``tenant_id`` index (``payload_m``), with ``is_tenant`` telling
+# Qdrant to co-locate each tenant's points on disk.
+HNSW_CONFIG = HnswConfigDiff(
+    m=0, payload_m=16, ef_construct=64, full_scan_threshold=10000
+)
+PAYLOAD_INDEXES = {
+    "tenant_id": KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=True),
+    "doc_id": KeywordIndexParams(type=KeywordIndexType.KEYWORD),
+}
+
+
+def quantization_config(
+    kind: str,
+) -> ScalarQuantization | BinaryQuantization | None:
+    if kind not in QUANTIZATION_KINDS:
+        raise ValueError(
+            f"unknown quantization {kind!r}, expected {QUANTIZATION_KINDS}"
+        )
+    if kind == "scalar":
+        return ScalarQuantization(
+            scalar=ScalarQuantizationConfig(
+                type=ScalarType.INT8, quantile=0.99, always_ram=True
+            )
+        )
+    if kind == "binary":
+        return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def _quantization_kind(config: object) -> str:
+    if isinstance(config, ScalarQuantization):
+        return "scalar"
+    if isinstance(config, BinaryQuantization):
+        return "binary"
+    return "none"
+
+
+def _index_matches(schema: PayloadIndexInfo | None, spec: KeywordIndexParams) -> bool:
+    if schema is None or schema.data_type != PayloadSchemaType.KEYWORD:
+        return False
+    return bool(getattr(schema.params, "is_tenant", None)) == bool(spec.is_tenant)
+
+
+def _sync_indexes(
+    client: QdrantClient, name: str, schema: dict[str, PayloadIndexInfo]
+) -> bool:
+    changed = False
+    for field, spec in PAYLOAD_INDEXES.items():
+        current = schema.get(field)
+        if _index_matches(current, spec):
+            continue
+        if current is not None:
+            client.delete_payload_index(name, field, wait=True)
+        client.create_payload_index(name, field, field_schema=spec, wait=True)
+        changed = True
+    return changed
+
+
+def _create(
+    client: QdrantClient, name: str, size: int, quantization: str, on_disk: bool
+) -> None:
+    client.create_collection(
+        collection_name=name,
+        vectors_config=VectorParams(
+            size=size, distance=Distance.COSINE, on_disk=on_disk
+        ),
+        sparse_vectors_config=SPARSE_CONFIG,
+        hnsw_config=HNSW_CONFIG,
+        quantization_config=quantization_config(quantization),
+    )
+    _sync_indexes(client, name, {})
+
+
+def ensure_collection(
+    client: QdrantClient,
+    name: str | None = None,
+    *,
+    model: EmbeddingModel = EMBEDDING_MODEL,
+    quantization: str = QUANTIZATION,
+    on_disk: bool = VECTORS_ON_DISK,
+    recreate: bool = False,
+) -> bool:
+    """Create ``name`` with the tenant-aware layout, or migrate it in place.
+
+    Collections created before the layout existed get the missing payload
+    indexes, HNSW and quantization settings; Qdrant rebuilds the graphs in
+    the background and keeps serving queries meanwhile. A collection without
+    the sparse BM25 vector cannot gain one in place; it is recreated empty
+    only with ``recreate``, otherwise this raises and leaves it untouched.
+
+    ``name`` defaults to ``model``'s collection and the vector size always
+    comes from ``model``; an existing collection of a different size is an
+    error rather than something to migrate.
+
+    Returns True if the collection was (re)created, in which case every
+    document has to be ingested again.
+    """
+    name = name or model.collection
+    if client.collection_exists(name):
+        params = client.get_collection(name).config.params
+        vectors = params.vectors
+        if isinstance(vectors, VectorParams) and vectors.size != model.dimensions:
+            raise ValueError(
+                f"collection {name!r} holds {vectors.size}-dim vectors but "
+                f"{model.name} produces {model.dimensions}"
+            )
+        if SPARSE_VECTOR in (params.sparse_vectors or {}):
+            migrate_collection(client, name, quantization=quantization, on_disk=on_disk)
+            return False
+        if not recreate:
+            raise ValueError(
+                f"collection {name!r} has no {SPARSE_VECTOR!r} sparse vector and "
+                f"must be recreated, deleting its points; reload everything with "
+                f"load_docs --full to do so"
+            )
+        client.delete_collection(name)
+    _create(client, name, model.dimensions, quantization, on_disk)
+    return True
+
+
+def migrate_collection(
+    client: QdrantClient,
+    name: str = DEFAULT_COLLECTION,
+    *,
+    quantization: str = QUANTIZATION,
+    on_disk: bool = VECTORS_ON_DISK,
+) -> bool:
+    """Bring an existing collection to the current layout; True if changed."""
+    info = client.get_collection(name)
+    changed = _sync_indexes(client, name, info.payload_schema or {})
+    hnsw = info.config.hnsw_config
+    if hnsw.m != HNSW_CONFIG.m or hnsw.payload_m != HNSW_CONFIG.payload_m:
+        client.update_collection(name, hnsw_config=HNSW_CONFIG)
+        changed = True
+    if _quantization_kind(info.config.quantization_config) != quantization:
+        client.update_collection(
+            name,
+            quantization_config=quantization_config(quantization) or Disabled.DISABLED,
+        )
+        changed = True
+    vectors = info.config.params.vectors
+    if isinstance(vectors, VectorParams) and bool(vectors.on_disk) != on_disk:
+        client.update_collection(
+            name, vectors_config={"": VectorParamsDiff(on_disk=on_disk)}
+        )
+        changed = True
+    return changed
+
+
+def search_params(
+    quantization: str = QUANTIZATION,
+    *,
+    oversampling: float | None = None,
+    rescore: bool | None = None,
+    hnsw_ef: int | None = None,
+) -> SearchParams:
+    """Query parameters for a collection quantized with ``quantization``.
+
+    ``oversampling`` fetches that many times ``limit`` candidates from the
+    quantized index and ``rescore`` re-ranks them with the original vectors;
+    both default to settings that keep recall close to unquantized search.
+    """
+    if quantization == "none":
+        return SearchParams(hnsw_ef=hnsw_ef)
+    return SearchParams(
+        hnsw_ef=hnsw_ef,
+        quantization=QuantizationSearchParams(
+            rescore=True if rescore is None else rescore,
+            oversampling=oversampling or OVERSAMPLING[quantization],
+        ),
+    )
+
+
+def _tenant_filter(tenant_id: str) -> Filter:
+    return Filter(
+        must=[FieldCondition(key="tenant_id", match=MatchValue(value=tenant_id))]
+    )
+
+
+def _query(
+    vector: Sequence[float] | None,
+    tenant_id: str,
+    *,
+    text: str | None,
+    limit: int,
+    name: str,
+    quantization: str,
+    oversampling: float | None,
+    rescore: bool | None,
+    hnsw_ef: int | None,
+) -> dict[str, Any]:
+    tenant = _tenant_filter(tenant_id)
+    sparse = query_vector(text) if text is not None else None
+    query: dict[str, Any] = {
+        "collection_name": name,
+        "query_filter": tenant,
+        "limit": limit,
+    }
+    if vector is None:
+        if sparse is None:
+            raise ValueError("search needs a vector or text with indexable terms")
+        return {**query, "query": sparse, "using": SPARSE_VECTOR}
+    params = search_params(
+        quantization, oversampling=oversampling, rescore=rescore, hnsw_ef=hnsw_ef
+    )
+    if sparse is None:
+        return {**query, "query": list(vector), "search_params": params}
+    candidates = limit * HYBRID_PREFETCH
+    return {
+        **query,
+        "prefetch": [
+            Prefetch(
+                query=list(vector), filter=tenant, params=params, limit=candidates
+            ),
+            Prefetch(
+                query=sparse, using=SPARSE_VECTOR, filter=tenant, limit=candidates
+            ),
+        ],
+        "query": FusionQuery(fusion=Fusion.RRF),
+    }
+
+
+def search(
+    client: QdrantClient,
+    vector: Sequence[float] | None,
+    tenant_id: str,
+    *,
+    text: str | None = None,
+    limit: int = 5,
+    name: str = DEFAULT_COLLECTION,
+    quantization: str = QUANTIZATION,
+    oversampling: float | None = None,
+    rescore: bool | None = None,
+    hnsw_ef: int | None = None,
+) -> list[ScoredPoint]:
+    """Best chunks of ``tenant_id``'s documents for ``vector`` and/or ``text``.
+
+    With only ``vector`` this is a dense search, with only ``text`` a BM25
+    search, and with both the two result lists are merged by reciprocal rank
+    fusion.
+    """
+    return client.query_points(
+        **_query(
+            vector,
+            tenant_id,
+            text=text,
+            limit=limit,
+            name=name,
+            quantization=quantization,
+            oversampling=oversampling,
+            rescore=rescore,
+            hnsw_ef=hnsw_ef,
+        )
+    ).points
+
+
+async def asearch(
+    client: AsyncQdrantClient,
+    vector: Sequence[float] | None,
+    tenant_id: str,
+    *,
+    text: str | None = None,
+    limit: int = 5,
+    name: str = DEFAULT_COLLECTION,
+    quantization: str = QUANTIZATION,
+    oversampling: float | None = None,
+    rescore: bool | None = None,
+    hnsw_ef: int | None = None,
+) -> list[ScoredPoint]:
+    """Non-blocking :func:`search`."""
+    response = await client.query_points(
+        **_query(
+            vector,
+            tenant_id,
+            text=text,
+            limit=limit,
+            name=name,
+            quantization=quantization,
+            oversampling=oversampling,
+            rescore=rescore,
+            hnsw_ef=hnsw_ef,
+        )
+    )
+    return response.points
+
+
+def current_documents(
+    client: QdrantClient,
+    tenant_id: str,
+    doc_ids: set[str],
+    *,
+    name: str = DEFAULT_COLLECTION,
+) -> set[str]:
+    """The subset of ``doc_ids`` (document checksums) still indexed for the
+    tenant; a changed or removed document's old checksum drops out."""
+    if not doc_ids:
+        return set()
+    tenant = _tenant_filter(tenant_id)
+    tenant.must.append(
+        FieldCondition(key="doc_id", match=MatchAny(any=sorted(doc_ids)))
+    )
+    response = client.facet(
+        name, "doc_id", facet_filter=tenant, limit=len(doc_ids), exact=True
+    )
+    return {str(hit.value) for hit in response.hits}
@@ -1,18 +1,205 @@
 from __future__ import annotations
 
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 import httpx
-from fastapi import FastAPI, status
+from fastapi import Depends, FastAPI, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.models import ScoredPoint
+
+from helpdesk_ai import db
+from helpdesk_ai.collection import asearch
+from helpdesk_ai.lexical import query_vector, strong_match
+from helpdesk_ai.llm.backends import BackendsUnavailable, parse_urls
+from helpdesk_ai.llm.embedding_cache import EmbeddingCache
+from helpdesk_ai.llm.embedding_models import EMBEDDING_MODEL
+from helpdesk_ai.llm.ollama_client import AsyncOllamaClient, aclose_shared_client
+from helpdesk_ai.llm.scheduler import Priority, SchedulerBusy, scheduled
+from helpdesk_ai.readiness import ReadinessProbe
+from helpdesk_ai.schemas import SearchHit, SearchRequest, SearchResponse
+
+QDRANT_URL = os.getenv("QDRANT_URL", "http://qdrant:6333")
+# One Ollama instance, or several separated by commas to balance across them.
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://ollama:11434/api")
+# Recent query vectors kept in memory; queries repeat far more than chunks do.
+QUERY_CACHE_ITEMS = int(os.getenv("QUERY_CACHE_ITEMS", "1024"))
+READY_TTL = float(os.getenv("READY_TTL", "2"))
+READY_TARGETS = {
+    # Use /readyz to check if the service is ready for traffic.
+    "qdrant": f"{QDRANT_URL}/readyz",
+    # The /api/status endpoint does not exist. Use the root endpoint. Ready
+    # while at least one instance answers.
+    "ollama": [url.removesuffix("/api") + "/" for url in parse_urls(OLLAMA_URL)],
+}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    app.state.http = httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=4, max_keepalive_connections=4)
+    )
+    app.state.readiness = ReadinessProbe(app.state.http, READY_TARGETS, ttl=READY_TTL)
+    app.state.qdrant = AsyncQdrantClient(url=QDRANT_URL)
+    app.state.embedder = AsyncOllamaClient(
+        OLLAMA_URL, cache=EmbeddingCache(memory_items=QUERY_CACHE_ITEMS)
+    )
+    # Connections are opened lazily, so startup does not wait on Postgres.
+    app.state.db = db.create_engine()
+    app.state.sessions = db.session_factory(app.state.db)
+    try:
+        yield
+    finally:
+        await app.state.db.dispose()
+        await app.state.qdrant.close()
+        await app.state.http.aclose()
+        await aclose_shared_client()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def get_qdrant(request: Request) -> AsyncQdrantClient:
+    return request.app.state.qdrant
+
+
+def get_embedder(request: Request) -> AsyncOllamaClient:
+    return request.app.state.embedder
+
+
+def get_readiness(request: Request) -> ReadinessProbe:
+    return request.app.state.readiness
+
 
-app = FastAPI()
+@app.exception_handler(SchedulerBusy)
+async def scheduler_busy(request: Request, exc: SchedulerBusy) -> JSONResponse:
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={"Retry-After": str(int(exc.retry_after))},
+    )
+
+
+@app.exception_handler(BackendsUnavailable)
+async def backends_unavailable(
+    request: Request, exc: BackendsUnavailable
+) -> JSONResponse:
+    return JSONResponse(
+        {"detail": str(exc)},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(math.ceil(exc.retry_after))},
+    )
+
+
+@app.get("/knowledge/live", status_code=status.HTTP_200_OK)
+async def knowledge_live() -> dict[str, str]:
+    """The process is up and serving; touches no backend."""
+    return {"status": "ok"}
 
 
 @app.get("/knowledge/ready", status_code=status.HTTP_200_OK)
-async def knowledge_ready() -> dict[str, str]:
-    async with httpx.AsyncClient() as ac:
-        # Use /readyz to check if the service is ready for traffic.
-        r1 = await ac.get("http://qdrant:6333/readyz", timeout=5)
-        r1.raise_for_status()
-        # The /api/status endpoint does not exist. Use the root endpoint.
-        r2 = await ac.get("http://ollama:11434/", timeout=5)
-        r2.raise_for_status()
+async def knowledge_ready(
+    probe: ReadinessProbe = Depends(get_readiness),
+) -> dict[str, str]:
+    results = await probe.check()
+    down = sorted(name for name, ok in results.items() if not ok)
+    if down:
+        raise HTTPException(
+            status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"unavailable: {', '.join(down)}",
+        )
     return {"status": "ok"}
+
+
+@app.get("/knowledge/queue")
+async def knowledge_queue(
+    embedder: AsyncOllamaClient = Depends(get_embedder),
+) -> dict[str, dict[str, float]]:
+    """Ollama scheduler queue depth and wait times per priority class."""
+    scheduler = embedder.scheduler()
+    return {
+        priority.name.lower(): {
+            "waiting": stats.waiting,
+            "admitted": stats.admitted,
+            "rejected": stats.rejected,
+            "mean_wait_ms": stats.mean_wait * 1000,
+            "max_wait_ms": stats.max_wait * 1000,
+        }
+        for priority, stats in scheduler.stats.items()
+    }
+
+
+def _hits(points: list[ScoredPoint]) -> SearchResponse:
+    return SearchResponse(
+        hits=[
+            SearchHit(
+                doc_id=p.payload.get("doc_id"),
+                chunk_index=p.payload.get("chunk_index"),
+                text=p.payload.get("text", ""),
+                score=p.score,
+            )
+            for p in points
+        ]
+    )
+
+
+@app.post("/knowledge/search", response_model=SearchResponse)
+async def knowledge_search(
+    body: SearchRequest,
+    response: Response,
+    qdrant: AsyncQdrantClient = Depends(get_qdrant),
+    embedder: AsyncOllamaClient = Depends(get_embedder),
+) -> SearchResponse:
+    """Top ``top_k`` chunks of the tenant's documents for ``query``.
+
+    ``hybrid`` mode first runs a BM25 search and answers from it alone when
+    the best hit clearly matches (see :func:`strong_match`); otherwise the
+    query is embedded and dense and BM25 results are fused. The path taken is
+    reported in ``X-Retrieval`` and stage timings in ``Server-Timing``.
+    ``lexical`` mode answers 422 for a query without any indexable term.
+    """
+    tenant_id = str(body.tenant_id)
+    timings: list[str] = []
+    started = time.perf_counter()
+
+    def lap(stage: str) -> None:
+        nonlocal started
+        now = time.perf_counter()
+        timings.append(f"{stage};dur={(now - started) * 1000:.1f}")
+        started = now
+
+    path = body.mode
+    points: list[ScoredPoint] | None = None
+    terms = query_vector(body.query) is not None
+    if body.mode == "lexical" and not terms:
+        raise HTTPException(
+            status.HTTP_422_UNPROCESSABLE_CONTENT,
+            detail="query has no terms to match in lexical mode",
+        )
+    lexical = body.mode != "dense" and terms
+    if lexical:
+        points = await asearch(
+            qdrant, None, tenant_id, text=body.query, limit=body.top_k
+        )
+        lap("lexical")
+        if body.mode == "hybrid" and not strong_match(body.query, points):
+            points = None
+        else:
+            path = "lexical"
+    if points is None:
+        with scheduled(Priority.QUERY, tenant_id):
+            vector = await embedder.embed(
+                EMBEDDING_MODEL.query(body.query), model=EMBEDDING_MODEL.name
+            )
+        lap("embed")
+        text = body.query if lexical else None
+        points = await asearch(qdrant, vector, tenant_id, text=text, limit=body.top_k)
+        lap("search")
+        path = "hybrid" if lexical else "dense"
+    response.headers["X-Retrieval"] = path
+    response.headers["Server-Timing"] = ", ".join(timings)
+    return _hits(points)
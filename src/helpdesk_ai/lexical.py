@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import re
+import zlib
+from collections import Counter
+from typing import Iterable
+
+from qdrant_client.models import ScoredPoint, SparseVector
+
+# BM25 term-frequency saturation and length normalisation. Qdrant applies the
+# IDF part at query time (``Modifier.IDF``), so only these are computed here.
+K1 = 1.2
+B = 0.75
+# Roughly the word count of a 512 character chunk.
+AVG_DOC_LEN = 80
+# A lexical hit is trusted without embedding the query when it contains every
+# query term and outscores the runner-up by this factor.
+STRONG_MARGIN = 1.5
+
+# Words joined by ``-``, ``_``, ``.``, ``/`` or ``:`` stay one token so error
+# codes, versions and product names such as ``0x80070005``, ``err-1042`` or
+# ``v2.3.1`` can be matched exactly; their parts are indexed as well.
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-_./:][a-z0-9]+)*")
+_PART = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it my of on "
+    "or our so that the this to was we what when where which who why will "
+    "with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    tokens = []
+    for token in _TOKEN.findall(text.lower()):
+        parts = _PART.findall(token)
+        if len(parts) > 1:
+            tokens.append(token)
+        tokens.extend(p for p in parts if p not in STOPWORDS)
+    return tokens
+
+
+def term_index(token: str) -> int:
+    """Stable sparse dimension for ``token``."""
+    return zlib.crc32(token.encode()) & 0x7FFFFFFF
+
+
+def _sparse(weights: dict[int, float]) -> SparseVector:
+    indices = sorted(weights)
+    return SparseVector(indices=indices, values=[weights[i] for i in indices])
+
+
+def document_vector(text: str) -> SparseVector | None:
+    """BM25 term weights for a chunk; ``None`` if it has no indexable terms."""
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    norm = K1 * (1 - B + B * len(tokens) / AVG_DOC_LEN)
+    weights: dict[int, float] = {}
+    for token, tf in Counter(tokens).items():
+        index = term_index(token)
+        weights[index] = weights.get(index, 0.0) + tf * (K1 + 1) / (tf + norm)
+    return _sparse(weights)
+
+
+def query_vector(text: str) -> SparseVector | None:
+    tokens = set(tokenize(text))
+    if not tokens:
+        return None
+    return _sparse({term_index(t): 1.0 for t in tokens})
+
+
+def strong_match(query: str, points: Iterable[ScoredPoint]) -> bool:
+    """True if the best lexical hit is clearly right on its own."""
+    ranked = list(points)
+    terms = set(tokenize(query))
+    if not ranked or not terms:
+        return False
+    top = ranked[0]
+    if not terms <= set(tokenize((top.payload or {}).get("text", ""))):
+        return False
+    return len(ranked) == 1 or top.score >= STRONG_MARGIN * ranked[1].score
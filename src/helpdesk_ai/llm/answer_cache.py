@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable, Sequence
+
+import numpy as np
+
+# Cosine similarity above which two questions are treated as the same one.
+THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))
+TTL = float(os.getenv("ANSWER_CACHE_TTL", str(24 * 3600)))
+MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_ENTRIES", "10000"))
+MAX_PER_TENANT = 1000
+
+# Given a tenant and the checksums an answer was grounded on, return the
+# checksums that are still current, e.g. ``VectorStore.current``.
+SyncSourceCheck = Callable[[str, set[str]], set[str]]
+SourceCheck = Callable[[str, set[str]], Awaitable[set[str]]]
+
+
+@dataclass
+class AnswerCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stale: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    sources: frozenset[str]
+    created: float
+    similarity: float = 1.0
+
+
+@dataclass
+class _Tenant:
+    keys: list[int] = field(default_factory=list)
+    entries: dict[int, CachedAnswer] = field(default_factory=dict)
+    vectors: dict[int, np.ndarray] = field(default_factory=dict)
+    # The tenant's keys from least to most recently used; ``keys`` stays in
+    # insertion order to line up with the matrix rows.
+    recent: OrderedDict[int, None] = field(default_factory=OrderedDict)
+    _matrix: np.ndarray | None = None
+
+    def matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            self._matrix = np.stack([self.vectors[k] for k in self.keys])
+        return self._matrix
+
+    def add(self, key: int, entry: CachedAnswer, vector: np.ndarray) -> None:
+        self.keys.append(key)
+        self.entries[key] = entry
+        self.vectors[key] = vector
+        self.recent[key] = None
+        self._matrix = None
+
+    def remove(self, key: int) -> None:
+        self.keys.remove(key)
+        del self.entries[key]
+        del self.vectors[key]
+        del self.recent[key]
+        self._matrix = None
+
+
+def _unit(vector: Sequence[float]) -> np.ndarray:
+    v = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
+
+
+class AnswerCache:
+    """Per-tenant cache of generated answers, looked up by question embedding.
+
+    A question whose embedding is within ``threshold`` cosine similarity of a
+    cached question gets that question's answer, provided the documents the
+    answer was grounded on (identified by checksum) are still current. Entries
+    expire after ``ttl`` seconds and the least recently used are dropped once
+    the cache holds ``max_entries``. Answers depend on the prompt template and
+    model, so use one cache per generation setup.
+    """
+
+    def __init__(
+        self,
+        *,
+        threshold: float = THRESHOLD,
+        ttl: float = TTL,
+        max_entries: int = MAX_ENTRIES,
+        max_per_tenant: int = MAX_PER_TENANT,
+    ) -> None:
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_per_tenant = max_per_tenant
+        self.stats = AnswerCacheStats()
+        self._tenants: dict[str, _Tenant] = {}
+        self._lru: OrderedDict[int, str] = OrderedDict()
+        self._next_key = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def _drop(self, key: int) -> None:
+        tenant_id = self._lru.pop(key)
+        tenant = self._tenants[tenant_id]
+        tenant.remove(key)
+        if not tenant.keys:
+            del self._tenants[tenant_id]
+
+    def _expire(self, tenant: _Tenant, now: float) -> None:
+        for key in [
+            k for k in tenant.keys if now - tenant.entries[k].created > self.ttl
+        ]:
+            self._drop(key)
+            self.stats.expired += 1
+
+    def _match(self, tenant_id: str, vector: Sequence[float]) -> CachedAnswer | None:
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is not None:
+                self._expire(tenant, time.time())
+                tenant = self._tenants.get(tenant_id)
+            if tenant is None:
+                return None
+            scores = tenant.matrix() @ _unit(vector)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            key = tenant.keys[best]
+            self._lru.move_to_end(key)
+            tenant.recent.move_to_end(key)
+            entry = tenant.entries[key]
+            return CachedAnswer(
+                entry.question,
+                entry.answer,
+                entry.sources,
+                entry.created,
+                float(scores[best]),
+            )
+
+    def _count(self, entry: CachedAnswer | None) -> CachedAnswer | None:
+        with self._lock:
+            if entry is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+        return entry
+
+    def _fresh(
+        self, tenant_id: str, entry: CachedAnswer, current: set[str]
+    ) -> CachedAnswer | None:
+        gone = entry.sources - current
+        if not gone:
+            return entry
+        self.invalidate(tenant_id, gone)
+        with self._lock:
+            self.stats.stale += 1
+        return None
+
+    def get(
+        self,
+        tenant_id: str,
+        vector: Sequence[float],
+        check: SyncSourceCheck | None = None,
+    ) -> CachedAnswer | None:
+        """Closest cached answer above the threshold.
+
+        Blocking counterpart of :meth:`lookup`; without ``check`` the sources
+        are not confirmed.
+        """
+        entry = self._match(tenant_id, vector)
+        if entry is not None and check is not None and entry.sources:
+            entry = self._fresh(tenant_id, entry, check(tenant_id, set(entry.sources)))
+        return self._count(entry)
+
+    async def lookup(
+        self,
+        tenant_id: str,
+        vector: Sequence[float],
+        check: SourceCheck | None = None,
+    ) -> CachedAnswer | None:
+        """Cached answer for a question, if its sources are unchanged.
+
+        ``check`` confirms the sources still exist; a stale entry is dropped
+        along with every other answer grounded on the changed documents.
+        """
+        entry = self._match(tenant_id, vector)
+        if entry is not None and check is not None and entry.sources:
+            current = await check(tenant_id, set(entry.sources))
+            entry = self._fresh(tenant_id, entry, current)
+        return self._count(entry)
+
+    def put(
+        self,
+        tenant_id: str,
+        question: str,
+        vector: Sequence[float],
+        answer: str,
+        sources: Iterable[str],
+    ) -> None:
+        with self._lock:
+            key = self._next_key
+            self._next_key += 1
+            tenant = self._tenants.setdefault(tenant_id, _Tenant())
+            entry = CachedAnswer(question, answer, frozenset(sources), time.time())
+            tenant.add(key, entry, _unit(vector))
+            self._lru[key] = tenant_id
+            while len(tenant.keys) > self.max_per_tenant:
+                self._drop(next(iter(tenant.recent)))
+                self.stats.evictions += 1
+            while len(self._lru) > self.max_entries:
+                self._drop(next(iter(self._lru)))
+                self.stats.evictions += 1
+
+    def invalidate(self, tenant_id: str, checksums: Iterable[str]) -> int:
+        """Drop the tenant's answers grounded on any of ``checksums``."""
+        changed = set(checksums)
+        with self._lock:
+            tenant = self._tenants.get(tenant_id)
+            if tenant is None:
+                return 0
+            doomed = [k for k in tenant.keys if tenant.entries[k].sources & changed]
+            for key in doomed:
+                self._drop(key)
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tenants.clear()
+            self._lru.clear()
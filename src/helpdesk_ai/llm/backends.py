@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterator, Sequence
+
+import httpx
+
+# Consecutive failures that take a backend out of rotation.
+EJECT_AFTER = int(os.getenv("OLLAMA_EJECT_AFTER", "3"))
+# First ejection lasts this long; each repeat doubles it up to EJECT_MAX.
+EJECT_BASE = float(os.getenv("OLLAMA_EJECT_SECONDS", "5"))
+EJECT_MAX = 120.0
+# How long Ollama keeps a model in memory after its last request (its default
+# ``keep_alive``); a backend that served a model more recently is warm.
+KEEP_ALIVE = float(os.getenv("OLLAMA_KEEP_ALIVE_SECONDS", "300"))
+# Extra in-flight requests a warm backend may carry before a cold one is
+# preferred; loading a model costs seconds, a short queue much less.
+AFFINITY_SLACK = 2
+
+
+class BackendsUnavailable(httpx.TransportError):
+    """Every backend is ejected; raised without contacting any of them."""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__(f"no Ollama backend available, retry in {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def parse_urls(base_url: str | Sequence[str]) -> list[str]:
+    """Backend URLs from a list or a comma-separated string."""
+    urls = base_url.split(",") if isinstance(base_url, str) else base_url
+    return [u.strip().rstrip("/") for u in urls if u.strip()]
+
+
+def unhealthy(exc: BaseException) -> bool:
+    """Whether a failure says something about the backend rather than the call."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+@dataclass
+class Backend:
+    url: str
+    outstanding: int = 0
+    served: int = 0
+    failures: int = 0
+    ejections: int = 0
+    ejected_until: float = 0.0
+    probing: bool = False
+    models: dict[str, float] = field(default_factory=dict)
+
+    def warm(self, model: str | None, now: float) -> bool:
+        last = self.models.get(model) if model else None
+        return last is not None and now - last < KEEP_ALIVE
+
+
+class BackendPool:
+    """Routes requests across Ollama backends.
+
+    Each request goes to the healthy backend with the fewest requests in
+    flight, preferring backends that recently served the same model so it is
+    still loaded. Failures are tracked passively: ``eject_after`` consecutive
+    connection errors or 5xx responses eject a backend for a backoff period,
+    after which a single trial request decides whether it rejoins. While
+    every backend is ejected, requests fail immediately with
+    :class:`BackendsUnavailable`.
+    """
+
+    def __init__(
+        self,
+        urls: Sequence[str],
+        *,
+        eject_after: int = EJECT_AFTER,
+        eject_base: float = EJECT_BASE,
+        eject_max: float = EJECT_MAX,
+    ) -> None:
+        if not urls:
+            raise ValueError("at least one Ollama URL is required")
+        self.backends = [Backend(url) for url in urls]
+        self.eject_after = eject_after
+        self.eject_base = eject_base
+        self.eject_max = eject_max
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.backends)
+
+    def _available(self, backend: Backend, now: float) -> bool:
+        if backend.ejected_until == 0:
+            return True
+        # Half-open: once the ejection lapses, let one request through.
+        return backend.ejected_until <= now and not backend.probing
+
+    def acquire(self, model: str | None) -> Backend:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [b for b in self.backends if self._available(b, now)]
+            if not candidates:
+                wait = min(b.ejected_until for b in self.backends) - now
+                raise BackendsUnavailable(max(wait, 0.0))
+            backend = min(
+                candidates,
+                key=lambda b: (
+                    b.outstanding - (AFFINITY_SLACK if b.warm(model, now) else 0),
+                    b.served,
+                ),
+            )
+            if backend.ejected_until:
+                backend.probing = True
+            backend.outstanding += 1
+            backend.served += 1
+            return backend
+
+    def release(
+        self, backend: Backend, model: str | None, error: BaseException | None
+    ) -> None:
+        now = time.monotonic()
+        with self._lock:
+            backend.outstanding -= 1
+            if error is None or not unhealthy(error):
+                # Any answer, even a 4xx, shows the backend is up.
+                if error is None and model:
+                    backend.models[model] = now
+                backend.failures = 0
+                backend.ejections = 0
+                backend.ejected_until = 0.0
+                backend.probing = False
+                return
+            backend.failures += 1
+            if backend.probing or backend.failures >= self.eject_after:
+                backend.probing = False
+                backend.failures = 0
+                backend.ejected_until = now + min(
+                    self.eject_max, self.eject_base * 2**backend.ejections
+                )
+                backend.ejections += 1
+                backend.models.clear()
+
+    @contextmanager
+    def lease(self, model: str | None) -> Iterator[Backend]:
+        """Pick a backend and record how the request inside the block went."""
+        backend = self.acquire(model)
+        try:
+            yield backend
+        except Exception as exc:
+            self.release(backend, model, exc)
+            raise
+        except BaseException:
+            # Cancelled or closed early: says nothing about the backend.
+            with self._lock:
+                backend.outstanding -= 1
+                backend.probing = False
+            raise
+        else:
+            self.release(backend, model, None)
+
+
+_pools: dict[tuple[str, ...], BackendPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_backends(urls: Sequence[str]) -> BackendPool:
+    """The process-wide pool for a set of backends, shared by all clients."""
+    key = tuple(urls)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = BackendPool(urls)
+        return _pools[key]
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Sequence
+
+# Where the ingest CLI keeps embeddings between runs; other callers stay in
+# memory unless ``EMBED_CACHE_PATH`` names a file.
+DEFAULT_PATH = Path.home() / ".cache" / "helpdesk_ai" / "embeddings.sqlite"
+MEMORY_ITEMS = 4096
+MAX_DISK_BYTES = 2 * 1024**3
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\0{normalize(text)}".encode()).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class EmbeddingCache:
+    """Content-addressed embedding store.
+
+    Vectors are keyed by ``(model, normalized text)``. A bounded in-process
+    LRU sits in front of an optional SQLite file holding packed float32
+    vectors; the file is trimmed to ``max_disk_bytes`` by least recent use.
+    Its size is measured once when opened and tracked on every write after.
+    """
+
+    def __init__(
+        self,
+        path: Path | str | None = None,
+        *,
+        memory_items: int = MEMORY_ITEMS,
+        max_disk_bytes: int = MAX_DISK_BYTES,
+    ) -> None:
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: sqlite3.Connection | None = None
+        self._disk_size = 0
+        if path is not None:
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embedding ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, "
+                "vector BLOB NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS embedding_accessed ON embedding (accessed)"
+            )
+            self._db.commit()
+            (self._disk_size,) = self._db.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embedding"
+            ).fetchone()
+
+    @property
+    def on_disk(self) -> bool:
+        """Whether lookups may read the SQLite file."""
+        return self._db is not None
+
+    def _remember(self, key: str, vector: list[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts: Sequence[str]) -> list[list[float] | None]:
+        keys = [cache_key(model, t) for t in texts]
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            in_memory = set(found)
+            pending = [k for k in dict.fromkeys(keys) if k not in found]
+            if pending and self._db is not None:
+                self._load(pending, found)
+            for key in keys:
+                if key in in_memory:
+                    self.stats.memory_hits += 1
+                elif key in found:
+                    self.stats.disk_hits += 1
+                else:
+                    self.stats.misses += 1
+        return [found.get(k) for k in keys]
+
+    def _load(self, keys: list[str], found: dict[str, list[float]]) -> None:
+        assert self._db is not None
+        now = time.time()
+        for start in range(0, len(keys), 500):
+            part = keys[start : start + 500]
+            marks = ",".join("?" * len(part))
+            rows = self._db.execute(
+                f"SELECT key, vector FROM embedding WHERE key IN ({marks})", part
+            ).fetchall()
+            for key, blob in rows:
+                vector = array("f", blob).tolist()
+                found[key] = vector
+                self._remember(key, vector)
+            self._db.executemany(
+                "UPDATE embedding SET accessed = ? WHERE key = ?",
+                [(now, key) for key, _ in rows],
+            )
+        self._db.commit()
+
+    def put_many(
+        self, model: str, texts: Sequence[str], vectors: Sequence[list[float]]
+    ) -> None:
+        now = time.time()
+        rows: dict[str, tuple[str, str, bytes, float]] = {}
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = cache_key(model, text)
+                self._remember(key, list(vector))
+                rows[key] = (key, model, array("f", vector).tobytes(), now)
+            if self._db is not None and rows:
+                added = sum(len(r[2]) for r in rows.values())
+                self._disk_size += added - self._sizes(list(rows))
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embedding VALUES (?, ?, ?, ?)",
+                    rows.values(),
+                )
+                self._db.commit()
+        if self._disk_size > self.max_disk_bytes:
+            self.evict(self.max_disk_bytes)
+
+    def _sizes(self, keys: list[str]) -> int:
+        """Bytes the stored vectors for ``keys`` take up, for rows replaced."""
+        assert self._db is not None
+        total = 0
+        for start in range(0, len(keys), 500):
+            part = keys[start : start + 500]
+            marks = ",".join("?" * len(part))
+            (size,) = self._db.execute(
+                "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embedding "
+                f"WHERE key IN ({marks})",
+                part,
+            ).fetchone()
+            total += size
+        return total
+
+    def disk_bytes(self) -> int:
+        return self._disk_size
+
+    def evict(self, max_bytes: int) -> int:
+        """Drop least recently used disk entries until under ``max_bytes``."""
+        if self._db is None:
+            return 0
+        with self._lock:
+            excess = self._disk_size - max_bytes
+            if excess <= 0:
+                return 0
+            doomed = []
+            rows = self._db.execute(
+                "SELECT key, LENGTH(vector) FROM embedding ORDER BY accessed"
+            )
+            for key, size in rows:
+                if excess <= 0:
+                    break
+                doomed.append((key,))
+                excess -= size
+                self._disk_size -= size
+            self._db.executemany("DELETE FROM embedding WHERE key = ?", doomed)
+            self._db.commit()
+            self.stats.evictions += len(doomed)
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embedding")
+                self._db.commit()
+            self._disk_size = 0
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+_default: EmbeddingCache | None = None
+_default_lock = threading.Lock()
+
+
+def cache_path(default: Path | None = None) -> Path | None:
+    """``EMBED_CACHE_PATH``, or ``default`` if unset; None when ``off``."""
+    setting = os.getenv("EMBED_CACHE_PATH")
+    if setting is None:
+        return default
+    return None if setting.lower() in {"", "off", "none"} else Path(setting)
+
+
+def default_cache() -> EmbeddingCache:
+    """Process-wide cache, memory-only unless ``EMBED_CACHE_PATH`` is set."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = EmbeddingCache(cache_path())
+        return _default
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+
+COLLECTION_PREFIX = "docs"
+
+
+@dataclass(frozen=True)
+class EmbeddingModel:
+    """An Ollama embedding model and the Qdrant collection its vectors live in.
+
+    Each model gets its own collection, so a corpus can be re-embedded with a
+    new model next to the one currently being served and switched over once
+    it is complete.
+    """
+
+    name: str
+    dimensions: int
+    # Some models are trained with task prefixes and embed noticeably better
+    # when queries and documents carry them.
+    query_prefix: str = ""
+    document_prefix: str = ""
+
+    @property
+    def collection(self) -> str:
+        if self.name == "llama3":
+            # Collections created before models were configurable.
+            return COLLECTION_PREFIX
+        slug = re.sub(r"[^a-z0-9]+", "_", self.name.lower()).strip("_")
+        return f"{COLLECTION_PREFIX}_{slug}"
+
+    def query(self, text: str) -> str:
+        return self.query_prefix + text
+
+    def document(self, text: str) -> str:
+        return self.document_prefix + text
+
+
+MODELS = {
+    m.name: m
+    for m in [
+        EmbeddingModel(
+            "nomic-embed-text",
+            768,
+            query_prefix="search_query: ",
+            document_prefix="search_document: ",
+        ),
+        EmbeddingModel(
+            "mxbai-embed-large",
+            1024,
+            query_prefix="Represent this sentence for searching relevant passages: ",
+        ),
+        EmbeddingModel("all-minilm", 384),
+        EmbeddingModel("llama3", 4096),
+    ]
+}
+DEFAULT_MODEL = "nomic-embed-text"
+
+
+def get_model(name: str | None = None) -> EmbeddingModel:
+    """Look up ``name`` (default ``EMBED_MODEL``, then ``nomic-embed-text``).
+
+    Models not listed in :data:`MODELS` can be used by also setting
+    ``EMBED_DIM`` to their vector size.
+    """
+    name = name or os.getenv("EMBED_MODEL") or DEFAULT_MODEL
+    name = name.removesuffix(":latest")
+    if name in MODELS:
+        return MODELS[name]
+    dimensions = os.getenv("EMBED_DIM")
+    if not dimensions:
+        raise ValueError(
+            f"unknown embedding model {name!r}; set EMBED_DIM or use one of "
+            f"{sorted(MODELS)}"
+        )
+    return EmbeddingModel(name, int(dimensions))
+
+
+EMBEDDING_MODEL = get_model()
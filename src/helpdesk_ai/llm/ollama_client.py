@@ -1,34 +1,357 @@
 from __future__ import annotations
 
+import asyncio
+import json as jsonlib
+import os
+import random
+import socket
+import threading
 import time
-from typing import Any
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import copy_context
+from typing import Any, AsyncIterator, Callable, Iterator, Sequence, TypeVar
 
 import httpx
 
+from helpdesk_ai.llm.backends import (
+    Backend,
+    BackendsUnavailable,
+    get_backends,
+    parse_urls,
+)
+from helpdesk_ai.llm.embedding_cache import EmbeddingCache, default_cache
+from helpdesk_ai.llm.embedding_models import EMBEDDING_MODEL
+from helpdesk_ai.llm.scheduler import Priority, Scheduler, current, get_scheduler
+from helpdesk_ai.llm.singleflight import (
+    AsyncSingleFlight,
+    SingleFlight,
+    coalescable,
+    request_key,
+)
+from helpdesk_ai.llm.streaming import AsyncTokenStream, TokenStream
+
 BASE_URL = "http://localhost:11434/api"
 
+TIMEOUT = httpx.Timeout(connect=5, read=120, write=120, pool=60)
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+MAX_CONNECTIONS = int(os.getenv("OLLAMA_MAX_CONNECTIONS", "32"))
+MAX_KEEPALIVE = int(os.getenv("OLLAMA_MAX_KEEPALIVE", "16"))
+KEEPALIVE_EXPIRY = float(os.getenv("OLLAMA_KEEPALIVE_EXPIRY", "60"))
+# Ollama serves a handful of requests per model at once; anything beyond that
+# just queues inside the container, so we queue on our side instead. The cap
+# is per process: every client shares one semaphore per backend and model.
+MAX_CONCURRENCY_PER_MODEL = int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4"))
+EMBED_BATCH_SIZE = 32
+EMBED_PARALLEL_BATCHES = 2
+
+T = TypeVar("T")
+
+
+def pool_limits(
+    max_connections: int = MAX_CONNECTIONS,
+    max_keepalive: int = MAX_KEEPALIVE,
+    keepalive_expiry: float = KEEPALIVE_EXPIRY,
+) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_keepalive,
+        keepalive_expiry=keepalive_expiry,
+    )
+
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt."""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+
+
+def _retryable(exc: httpx.HTTPError) -> bool:
+    if isinstance(exc, BackendsUnavailable):
+        return False
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code >= 500 or code == 429
+    return isinstance(exc, httpx.TransportError)
+
+
+class _OllamaCore:
+    """Payload construction and retry policy shared by both clients."""
+
+    def __init__(
+        self,
+        base_url: str | Sequence[str],
+        cache: EmbeddingCache | None = None,
+        use_cache: bool = True,
+    ) -> None:
+        urls = parse_urls(base_url)
+        self.backends = get_backends(urls)
+        # Names the deployment in scheduler and coalescing keys.
+        self.base_url = ",".join(urls)
+        self.cache = (cache or default_cache()) if use_cache else None
+
+    def _lookup(
+        self, texts: Sequence[str], model: str
+    ) -> tuple[list[list[float] | None], list[str]]:
+        """Return cached vectors (or None) and the unique texts still to embed."""
+        if self.cache is None:
+            hits: list[list[float] | None] = [None] * len(texts)
+        else:
+            hits = self.cache.get_many(model, texts)
+        missing = list(dict.fromkeys(t for t, v in zip(texts, hits) if v is None))
+        return hits, missing
+
+    def _merge(
+        self,
+        texts: Sequence[str],
+        hits: list[list[float] | None],
+        missing: list[str],
+        vectors: list[list[float]],
+        model: str,
+    ) -> list[list[float]]:
+        if self.cache is not None and missing:
+            self.cache.put_many(model, missing, vectors)
+        fresh = dict(zip(missing, vectors))
+        return [v if v is not None else fresh[t] for t, v in zip(texts, hits)]
+
+    def _url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    @staticmethod
+    def _attempts() -> Iterator[int]:
+        return iter(range(MAX_ATTEMPTS))
+
+    @staticmethod
+    def _should_retry(exc: httpx.HTTPError, attempt: int) -> bool:
+        return attempt < MAX_ATTEMPTS - 1 and _retryable(exc)
+
+    @staticmethod
+    def _model_of(json: dict[str, Any] | None) -> str | None:
+        return json.get("model") if json else None
+
+    def _schedule(self, path: str) -> tuple[Priority, str]:
+        """Priority and tenant for a call, from :func:`scheduled` if set."""
+        default = Priority.INTERACTIVE if path == "/generate" else Priority.QUERY
+        return current(default)
+
+    def scheduler(self) -> Scheduler:
+        """The scheduler shared by every client of this deployment."""
+        return get_scheduler(self.base_url, len(self.backends))
+
+    @staticmethod
+    def _generate_payload(
+        prompt: str,
+        system: str | None,
+        temperature: float,
+        model: str,
+        stream: bool = False,
+        options: dict[str, Any] | None = None,
+        keep_alive: str | None = None,
+    ) -> dict[str, Any]:
+        payload: dict[str, Any] = {
+            "model": model,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {**(options or {}), "temperature": temperature},
+        }
+        if system is not None:
+            payload["system"] = system
+        if keep_alive is not None:
+            payload["keep_alive"] = keep_alive
+        return payload
+
+    @staticmethod
+    def _checked(resp: httpx.Response) -> httpx.Response:
+        try:
+            resp.raise_for_status()
+        except httpx.HTTPStatusError:
+            resp.close()
+            raise
+        return resp
+
+    @staticmethod
+    def _embed_payload(texts: Sequence[str], model: str) -> dict[str, Any]:
+        return {"model": model, "input": list(texts)}
+
+    @staticmethod
+    def _batches(texts: Sequence[str], batch_size: int) -> list[Sequence[str]]:
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        return [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+
+    @staticmethod
+    def _embeddings(resp: httpx.Response, expected: int) -> list[list[float]]:
+        vectors = resp.json().get("embeddings", [])
+        if len(vectors) != expected:
+            raise RuntimeError(
+                f"ollama returned {len(vectors)} embeddings for {expected} inputs"
+            )
+        return vectors
+
+
+_sync_slots: dict[tuple[str, str], threading.BoundedSemaphore] = {}
+_sync_slots_lock = threading.Lock()
+# Identical embedding and temperature-0 generation requests made at the same
+# time share one upstream call.
+_sync_flights = SingleFlight()
+
 
-class OllamaClient:
-    def __init__(self, base_url: str = BASE_URL) -> None:
-        self.base_url = base_url.rstrip("/")
-        self._client = httpx.Client()
+class _Hangup:
+    """Cuts off a streamed response from another thread.
+
+    Closing the response would race the thread reading it, so the socket is
+    shut down instead, which also wakes a read blocked on it.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._response: httpx.Response | None = None
+        self._cancelled = False
+
+    def watch(self, response: httpx.Response) -> None:
+        with self._lock:
+            self._response = response
+            cancelled = self._cancelled
+        if cancelled:
+            self._shutdown(response)
+
+    def __call__(self) -> None:
+        with self._lock:
+            self._cancelled = True
+            response = self._response
+        if response is not None:
+            self._shutdown(response)
+
+    @staticmethod
+    def _shutdown(response: httpx.Response) -> None:
+        stream = response.extensions.get("network_stream")
+        sock = stream.get_extra_info("socket") if stream is not None else None
+        if sock is None:
+            return
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass  # already closed
+
+
+class OllamaClient(_OllamaCore):
+    """Blocking Ollama client.
+
+    ``base_url`` may list several Ollama instances (a sequence or a
+    comma-separated string); requests are balanced across them by
+    :class:`~helpdesk_ai.llm.backends.BackendPool`. A ``client`` given is
+    used instead of one built from ``limits``.
+    """
+
+    def __init__(
+        self,
+        base_url: str | Sequence[str] = BASE_URL,
+        *,
+        limits: httpx.Limits | None = None,
+        client: httpx.Client | None = None,
+        cache: EmbeddingCache | None = None,
+        use_cache: bool = True,
+    ) -> None:
+        super().__init__(base_url, cache, use_cache)
+        self._client = client or httpx.Client(
+            limits=limits or pool_limits(), timeout=TIMEOUT
+        )
+
+    def _slot(self, url: str, model: str) -> threading.BoundedSemaphore:
+        key = (url, model)
+        with _sync_slots_lock:
+            if key not in _sync_slots:
+                _sync_slots[key] = threading.BoundedSemaphore(MAX_CONCURRENCY_PER_MODEL)
+            return _sync_slots[key]
+
+    @contextmanager
+    def _admitted(self, model: str | None, path: str) -> Iterator[Backend]:
+        """Scheduler slot, then a backend and a slot for the model on it."""
+        if model is None:
+            with self.backends.lease(None) as backend:
+                yield backend
+            return
+        with self.scheduler().slot(*self._schedule(path)):
+            with self.backends.lease(model) as backend, self._slot(backend.url, model):
+                yield backend
+
+    def _send(
+        self, method: str, url: str, json: dict[str, Any] | None
+    ) -> httpx.Response:
+        resp = self._client.request(method, url, json=json)
+        resp.raise_for_status()
+        return resp
 
     def _request(
         self, method: str, path: str, json: dict[str, Any] | None = None
     ) -> httpx.Response:
-        url = f"{self.base_url}{path}"
-        for delay in (0.0, 0.5, 1.0):
+        if coalescable(path, json):
+            return _sync_flights.do(
+                request_key(self._url(path), json),
+                lambda: self._call(method, path, json),
+            )
+        return self._call(method, path, json)
+
+    def _call(
+        self, method: str, path: str, json: dict[str, Any] | None
+    ) -> httpx.Response:
+        model = self._model_of(json)
+        for attempt in self._attempts():
             try:
-                timeout = httpx.Timeout(connect=5, read=120, write=120, pool=60)
-                resp = self._client.request(method, url, json=json, timeout=timeout)
-                resp.raise_for_status()
-                return resp
-            except httpx.HTTPError:
-                if delay == 1.0:
+                with self._admitted(model, path) as backend:
+                    return self._send(method, f"{backend.url}{path}", json)
+            except httpx.HTTPError as exc:
+                if not self._should_retry(exc, attempt):
                     raise
-                time.sleep(delay)
+                time.sleep(_backoff(attempt))
         raise RuntimeError("unreachable")
 
+    def _stream(self, path: str, json: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        if coalescable(path, json):
+            # Callers read the one upstream stream through a broadcast, which
+            # is opened lazily so ``generate_stream`` stays cheap to call.
+            hangup = _Hangup()
+            yield from _sync_flights.stream(
+                request_key(self._url(path), json),
+                lambda: self._stream_upstream(path, json, hangup),
+                hangup,
+            )
+            return
+        yield from self._stream_upstream(path, json)
+
+    def _stream_upstream(
+        self, path: str, json: dict[str, Any], hangup: _Hangup | None = None
+    ) -> Iterator[dict[str, Any]]:
+        for attempt in self._attempts():
+            opened = False
+            try:
+                with self._admitted(json["model"], path) as backend:
+                    request = self._client.build_request(
+                        "POST", f"{backend.url}{path}", json=json
+                    )
+                    resp = self._checked(self._client.send(request, stream=True))
+                    opened = True
+                    if hangup is not None:
+                        hangup.watch(resp)
+                    try:
+                        for line in resp.iter_lines():
+                            if line:
+                                yield jsonlib.loads(line)
+                    finally:
+                        resp.close()
+                    return
+            except httpx.HTTPError as exc:
+                # Only opening the response is retried; once tokens have been
+                # handed to the caller a retry would duplicate them.
+                if opened or not self._should_retry(exc, attempt):
+                    raise
+                time.sleep(_backoff(attempt))
+
+    def close(self) -> None:
+        self._client.close()
+
     def status(self) -> dict[str, Any]:
         """Return a simple health status for the Ollama server."""
         # Older versions of Ollama exposed ``/status`` which returned
@@ -46,23 +369,317 @@ class OllamaClient:
         system: str | None = None,
         temperature: float = 0.7,
         model: str = "llama3",
+        options: dict[str, Any] | None = None,
+        keep_alive: str | None = None,
     ) -> str:
-        payload: dict[str, Any] = {
-            "model": model,
-            "prompt": prompt,
-            "stream": False,
-            "options": {"temperature": temperature},
-        }
-        if system is not None:
-            payload["system"] = system
+        payload = self._generate_payload(
+            prompt, system, temperature, model, False, options, keep_alive
+        )
         return (
             self._request("POST", "/generate", json=payload).json().get("response", "")
         )
 
-    def embed(self, text: str, *, model: str = "llama3") -> list[float]:
-        payload = {"model": model, "prompt": text}
-        return (
-            self._request("POST", "/embeddings", json=payload)
-            .json()
-            .get("embedding", [])
+    def generate_stream(
+        self,
+        prompt: str,
+        *,
+        system: str | None = None,
+        temperature: float = 0.7,
+        model: str = "llama3",
+        options: dict[str, Any] | None = None,
+        keep_alive: str | None = None,
+    ) -> TokenStream:
+        """Stream tokens as Ollama produces them.
+
+        The request is sent lazily on the first ``next()``; ``stats`` is
+        complete once the iterator is exhausted.
+        """
+        payload = self._generate_payload(
+            prompt, system, temperature, model, True, options, keep_alive
+        )
+        return TokenStream(self._stream("/generate", payload))
+
+    def embed(self, text: str, *, model: str | None = None) -> list[float]:
+        return self.embed_many([text], model=model)[0]
+
+    def _embed_batch(self, texts: Sequence[str], model: str) -> list[list[float]]:
+        payload = self._embed_payload(texts, model)
+        return self._embeddings(
+            self._request("POST", "/embed", json=payload), len(texts)
+        )
+
+    def embed_many(
+        self,
+        texts: Sequence[str],
+        *,
+        model: str | None = None,
+        batch_size: int = EMBED_BATCH_SIZE,
+        parallel: int = EMBED_PARALLEL_BATCHES,
+    ) -> list[list[float]]:
+        """Embed ``texts`` via ``/api/embed``, preserving input order.
+
+        ``model`` defaults to the configured embedding model (``EMBED_MODEL``).
+        Cached vectors are served from ``self.cache``; only the remaining
+        unique texts are sent, with up to ``parallel`` batches in flight at
+        once subject to the per-model concurrency cap.
+        """
+        model = model or EMBEDDING_MODEL.name
+        hits, missing = self._lookup(texts, model)
+        batches = self._batches(missing, batch_size)
+        if len(batches) <= 1 or parallel <= 1:
+            results = [self._embed_batch(b, model) for b in batches]
+        else:
+            # Worker threads start with an empty context; carry the caller's
+            # priority and tenant over to them.
+            context = copy_context()
+            with ThreadPoolExecutor(max_workers=parallel) as pool:
+                results = list(
+                    pool.map(
+                        lambda b: context.copy().run(self._embed_batch, b, model),
+                        batches,
+                    )
+                )
+        vectors = [vec for batch in results for vec in batch]
+        return self._merge(texts, hits, missing, vectors, model)
+
+
+class _SharedAsyncPool:
+    """Process-wide ``httpx.AsyncClient`` and per-model semaphores.
+
+    Connections and semaphores are bound to the event loop that created them,
+    so the pool is rebuilt when it is first used from a different loop (e.g.
+    successive ``anyio.run`` calls in scripts and tests).
+    """
+
+    def __init__(self) -> None:
+        self.limits = pool_limits()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._client: httpx.AsyncClient | None = None
+        self._semaphores: dict[tuple[str, str], asyncio.Semaphore] = {}
+        self._flights = AsyncSingleFlight()
+
+    def _check_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._client = None
+            self._semaphores = {}
+            self._flights = AsyncSingleFlight()
+
+    def flights(self) -> AsyncSingleFlight:
+        self._check_loop()
+        return self._flights
+
+    def client(self) -> httpx.AsyncClient:
+        self._check_loop()
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=TIMEOUT)
+        return self._client
+
+    def semaphore(self, base_url: str, model: str) -> asyncio.Semaphore:
+        self._check_loop()
+        key = (base_url, model)
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(MAX_CONCURRENCY_PER_MODEL)
+        return self._semaphores[key]
+
+    async def aclose(self) -> None:
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+
+_shared_pool = _SharedAsyncPool()
+
+
+def configure_async_pool(
+    max_connections: int = MAX_CONNECTIONS,
+    max_keepalive: int = MAX_KEEPALIVE,
+    keepalive_expiry: float = KEEPALIVE_EXPIRY,
+) -> None:
+    """Set the limits used the next time the shared async client is created."""
+    _shared_pool.limits = pool_limits(max_connections, max_keepalive, keepalive_expiry)
+
+
+async def aclose_shared_client() -> None:
+    await _shared_pool.aclose()
+
+
+class AsyncOllamaClient(_OllamaCore):
+    """Non-blocking counterpart of :class:`OllamaClient`.
+
+    All instances share one pooled ``httpx.AsyncClient`` unless ``client`` is
+    given, and in-flight requests are capped per ``(backend, model)``.
+    """
+
+    def __init__(
+        self,
+        base_url: str | Sequence[str] = BASE_URL,
+        *,
+        client: httpx.AsyncClient | None = None,
+        cache: EmbeddingCache | None = None,
+        use_cache: bool = True,
+    ) -> None:
+        super().__init__(base_url, cache, use_cache)
+        self._own_client = client
+
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        return self._own_client or _shared_pool.client()
+
+    async def _send(
+        self, method: str, url: str, json: dict[str, Any] | None
+    ) -> httpx.Response:
+        resp = await self._client.request(method, url, json=json)
+        resp.raise_for_status()
+        return resp
+
+    @asynccontextmanager
+    async def _admitted(self, model: str | None, path: str) -> AsyncIterator[Backend]:
+        if model is None:
+            with self.backends.lease(None) as backend:
+                yield backend
+            return
+        async with self.scheduler().aslot(*self._schedule(path)):
+            with self.backends.lease(model) as backend:
+                async with _shared_pool.semaphore(backend.url, model):
+                    yield backend
+
+    async def _request(
+        self, method: str, path: str, json: dict[str, Any] | None = None
+    ) -> httpx.Response:
+        if coalescable(path, json):
+            return await _shared_pool.flights().do(
+                request_key(self._url(path), json),
+                lambda: self._call(method, path, json),
+            )
+        return await self._call(method, path, json)
+
+    async def _call(
+        self, method: str, path: str, json: dict[str, Any] | None
+    ) -> httpx.Response:
+        model = self._model_of(json)
+        for attempt in self._attempts():
+            try:
+                async with self._admitted(model, path) as backend:
+                    return await self._send(method, f"{backend.url}{path}", json)
+            except httpx.HTTPError as exc:
+                if not self._should_retry(exc, attempt):
+                    raise
+                await asyncio.sleep(_backoff(attempt))
+        raise RuntimeError("unreachable")
+
+    async def _stream(
+        self, path: str, json: dict[str, Any]
+    ) -> AsyncIterator[dict[str, Any]]:
+        if not coalescable(path, json):
+            async for chunk in self._stream_upstream(path, json):
+                yield chunk
+            return
+        chunks = _shared_pool.flights().stream(
+            request_key(self._url(path), json),
+            lambda: self._stream_upstream(path, json),
         )
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+
+    async def _stream_upstream(
+        self, path: str, json: dict[str, Any]
+    ) -> AsyncIterator[dict[str, Any]]:
+        for attempt in self._attempts():
+            opened = False
+            try:
+                async with self._admitted(json["model"], path) as backend:
+                    request = self._client.build_request(
+                        "POST", f"{backend.url}{path}", json=json
+                    )
+                    resp = await self._client.send(request, stream=True)
+                    if resp.is_error:
+                        await resp.aclose()
+                    resp.raise_for_status()
+                    opened = True
+                    try:
+                        async for line in resp.aiter_lines():
+                            if line:
+                                yield jsonlib.loads(line)
+                    finally:
+                        await resp.aclose()
+                    return
+            except httpx.HTTPError as exc:
+                if opened or not self._should_retry(exc, attempt):
+                    raise
+                await asyncio.sleep(_backoff(attempt))
+
+    async def status(self) -> dict[str, Any]:
+        await self._request("GET", "/tags")
+        return {"status": "ok"}
+
+    async def generate(
+        self,
+        prompt: str,
+        *,
+        system: str | None = None,
+        temperature: float = 0.7,
+        model: str = "llama3",
+        options: dict[str, Any] | None = None,
+        keep_alive: str | None = None,
+    ) -> str:
+        payload = self._generate_payload(
+            prompt, system, temperature, model, False, options, keep_alive
+        )
+        resp = await self._request("POST", "/generate", json=payload)
+        return resp.json().get("response", "")
+
+    def generate_stream(
+        self,
+        prompt: str,
+        *,
+        system: str | None = None,
+        temperature: float = 0.7,
+        model: str = "llama3",
+        options: dict[str, Any] | None = None,
+        keep_alive: str | None = None,
+    ) -> AsyncTokenStream:
+        payload = self._generate_payload(
+            prompt, system, temperature, model, True, options, keep_alive
+        )
+        return AsyncTokenStream(self._stream("/generate", payload))
+
+    async def embed(self, text: str, *, model: str | None = None) -> list[float]:
+        return (await self.embed_many([text], model=model))[0]
+
+    async def _embed_batch(self, texts: Sequence[str], model: str) -> list[list[float]]:
+        payload = self._embed_payload(texts, model)
+        resp = await self._request("POST", "/embed", json=payload)
+        return self._embeddings(resp, len(texts))
+
+    async def embed_many(
+        self,
+        texts: Sequence[str],
+        *,
+        model: str | None = None,
+        batch_size: int = EMBED_BATCH_SIZE,
+        parallel: int = EMBED_PARALLEL_BATCHES,
+    ) -> list[list[float]]:
+        limit = asyncio.Semaphore(max(parallel, 1))
+
+        async def run(batch: Sequence[str]) -> list[list[float]]:
+            async with limit:
+                return await self._embed_batch(batch, model)
+
+        model = model or EMBEDDING_MODEL.name
+        hits, missing = await self._offload(self._lookup, texts, model)
+        results = await asyncio.gather(
+            *(run(b) for b in self._batches(missing, batch_size))
+        )
+        vectors = [vec for batch in results for vec in batch]
+        return await self._offload(self._merge, texts, hits, missing, vectors, model)
+
+    async def _offload(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run a cache call, in a worker thread if it may touch the SQLite file."""
+        if self.cache is not None and self.cache.on_disk:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
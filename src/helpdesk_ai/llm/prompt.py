@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Protocol, Sequence
+
+from helpdesk_ai.llm.answer_cache import AnswerCache, SyncSourceCheck
+from helpdesk_ai.llm.ollama_client import AsyncOllamaClient, OllamaClient
+
+# Tokens of retrieved context packed into a prompt. Prompt evaluation is most
+# of the latency on CPU, so this stays well under the context window.
+CONTEXT_BUDGET = int(os.getenv("RAG_CONTEXT_TOKENS", "1536"))
+# Context window requested from Ollama. It must not vary between requests:
+# a different num_ctx reloads the model and throws the KV cache away.
+NUM_CTX = int(os.getenv("RAG_NUM_CTX", "4096"))
+# Room left for the answer itself.
+ANSWER_TOKENS = 512
+# Keep the model, and with it the cached system-prompt prefix, loaded.
+KEEP_ALIVE = os.getenv("RAG_KEEP_ALIVE", "30m")
+# Shared edges between neighbouring chunks treated as overlap. load_docs
+# overlaps by up to 20 characters; shorter matches are likely coincidence.
+MIN_OVERLAP = 8
+MAX_OVERLAP = 200
+
+# Sent unchanged with every request so Ollama can reuse the evaluated prefix.
+# Anything request-specific belongs in the prompt, never in here.
+SYSTEM_PROMPT = (
+    "You are a helpdesk assistant. Answer the user's question using only the "
+    "numbered context passages. Cite the passages you use like [1]. If the "
+    "context does not contain the answer, say you don't know."
+)
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate llama3 token count, erring high.
+
+    Common words are one token and rarer long ones split into pieces of about
+    five characters; punctuation counts separately.
+    """
+    return sum(max(1, math.ceil(len(w) / 5)) for w in _WORD.findall(text))
+
+
+class Passage(Protocol):
+    doc_id: str
+    chunk_index: int
+    text: str
+    score: float
+
+
+@dataclass
+class _Block:
+    """A run of consecutive chunks of one document."""
+
+    doc_id: str
+    first: int
+    last: int
+    score: float
+    texts: list[str] = field(default_factory=list)
+    # Tokens of the block as listed: header, text and separator.
+    cost: int = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.texts)
+
+
+@dataclass
+class RagPrompt:
+    system: str
+    prompt: str
+    sources: frozenset[str]
+    tokens: int
+    dropped: int
+    question: str = ""
+
+
+def _overlap(left: str, right: str) -> int:
+    """Length of the longest suffix of ``left`` that starts ``right``."""
+    for size in range(min(len(left), len(right), MAX_OVERLAP), MIN_OVERLAP - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+def _after(left: str, right: str) -> str:
+    """``right`` without the part that repeats the end of ``left``."""
+    size = _overlap(left, right)
+    return right[size:] if size else "\n" + right
+
+
+def _before(left: str, right: str) -> str:
+    """``left`` without the part that ``right`` repeats."""
+    size = _overlap(left, right)
+    return left[: len(left) - size] if size else left + "\n"
+
+
+class PromptBuilder:
+    """Packs retrieved chunks into a prompt that fits a token budget.
+
+    Passages are taken best score first and skipped when they no longer fit.
+    Exact duplicates are dropped, and the overlap between consecutive chunks
+    of a document is included once: neighbours are joined into one passage,
+    listed at the position of its best-scoring chunk. The system prompt is
+    fixed and requests pin ``num_ctx`` and ``keep_alive`` so Ollama can keep
+    the model loaded and reuse the evaluated system prefix.
+
+    ``count`` measures text in tokens; pass the model's tokenizer for exact
+    budgets instead of :func:`estimate_tokens`.
+
+    With a ``cache``, answers are kept per tenant under the query embedding
+    used for retrieval, grounded on the prompt's sources. ``check`` (usually
+    the vector store's ``current``) confirms those are unchanged before a
+    cached answer is reused. Prompts without sources are not cached: nothing
+    would invalidate their answer once matching documents are added.
+    """
+
+    def __init__(
+        self,
+        *,
+        budget: int = CONTEXT_BUDGET,
+        num_ctx: int = NUM_CTX,
+        answer_tokens: int = ANSWER_TOKENS,
+        system: str = SYSTEM_PROMPT,
+        keep_alive: str = KEEP_ALIVE,
+        model: str = "llama3",
+        count: Callable[[str], int] = estimate_tokens,
+        cache: AnswerCache | None = None,
+        check: SyncSourceCheck | None = None,
+    ) -> None:
+        self.budget = budget
+        self.num_ctx = num_ctx
+        self.answer_tokens = answer_tokens
+        self.system = system
+        self.keep_alive = keep_alive
+        self.model = model
+        self.count = count
+        self.cache = cache
+        self.check = check
+
+    @staticmethod
+    def _header(index: int, doc_id: str) -> str:
+        return f"[{index}] (document {doc_id})\n"
+
+    def _pack(
+        self, passages: Iterable[Passage], budget: int
+    ) -> tuple[list[_Block], int]:
+        blocks: list[_Block] = []
+        by_chunk: dict[tuple[str, int], _Block] = {}
+        seen: set[str] = set()
+        used = dropped = 0
+        for p in sorted(passages, key=lambda p: p.score, reverse=True):
+            text = p.text.strip()
+            if text in seen or (p.doc_id, p.chunk_index) in by_chunk:
+                continue
+            seen.add(text)
+            before = by_chunk.get((p.doc_id, p.chunk_index - 1))
+            after = by_chunk.get((p.doc_id, p.chunk_index + 1))
+            if before is not None:
+                text = _after(before.texts[-1], text)
+            if after is not None:
+                text = _before(text, after.texts[0])
+            joined = [b for b in (before, after) if b is not None]
+            if joined:
+                # Keep whichever run was listed first (it scored higher).
+                block = min(joined, key=blocks.index)
+                position = blocks.index(block)
+            else:
+                block = _Block(p.doc_id, p.chunk_index, p.chunk_index, p.score)
+                position = len(blocks)
+            texts = [*(before.texts if before else []), text]
+            texts += after.texts if after else []
+            # Joining drops a header and the overlap, so the merged block is
+            # counted again rather than adding up its parts.
+            cost = self.count(
+                self._header(position + 1, p.doc_id) + "".join(texts) + "\n\n"
+            )
+            delta = cost - sum(b.cost for b in joined)
+            if used + delta > budget:
+                dropped += 1
+                continue
+            used += delta
+            block.texts, block.cost = texts, cost
+            block.first = before.first if before else p.chunk_index
+            block.last = after.last if after else p.chunk_index
+            for other in joined:
+                if other is not block:
+                    blocks.remove(other)
+            if not joined:
+                blocks.append(block)
+            for i in range(block.first, block.last + 1):
+                by_chunk[(p.doc_id, i)] = block
+        return blocks, dropped
+
+    def build(self, question: str, passages: Sequence[Passage]) -> RagPrompt:
+        question = question.strip()
+        tail = f"Question: {question}\nAnswer:"
+        fixed = self.count(self.system) + self.count(tail) + self.count("Context:\n")
+        budget = min(self.budget, self.num_ctx - self.answer_tokens - fixed)
+        if budget <= 0:
+            raise ValueError(
+                f"question needs {fixed} tokens, leaving no room in num_ctx "
+                f"{self.num_ctx}"
+            )
+        blocks, dropped = self._pack(passages, budget)
+        context = "\n\n".join(
+            self._header(i, b.doc_id) + b.text for i, b in enumerate(blocks, 1)
+        )
+        prompt = f"Context:\n{context}\n\n{tail}" if blocks else tail
+        return RagPrompt(
+            system=self.system,
+            prompt=prompt,
+            sources=frozenset(b.doc_id for b in blocks),
+            tokens=self.count(self.system) + self.count(prompt),
+            dropped=dropped,
+            question=question,
+        )
+
+    def _options(self) -> dict:
+        return {"num_ctx": self.num_ctx, "num_predict": self.answer_tokens}
+
+    def _caching(
+        self, rag: RagPrompt, tenant_id: str | None, vector: Sequence[float] | None
+    ) -> bool:
+        return (
+            self.cache is not None
+            and tenant_id is not None
+            and vector is not None
+            and bool(rag.sources)
+        )
+
+    async def _acheck(self, tenant_id: str, checksums: set[str]) -> set[str]:
+        return await asyncio.to_thread(self.check, tenant_id, checksums)
+
+    def generate(
+        self,
+        client: OllamaClient,
+        rag: RagPrompt,
+        *,
+        tenant_id: str | None = None,
+        vector: Sequence[float] | None = None,
+    ) -> str:
+        """Answer ``rag``; ``vector`` is the query embedding used to retrieve it."""
+        caching = self._caching(rag, tenant_id, vector)
+        if caching:
+            hit = self.cache.get(tenant_id, vector, self.check)
+            if hit is not None:
+                return hit.answer
+        # Deterministic answers also make identical concurrent questions
+        # eligible for request coalescing.
+        answer = client.generate(
+            rag.prompt,
+            system=rag.system,
+            temperature=0,
+            model=self.model,
+            options=self._options(),
+            keep_alive=self.keep_alive,
+        )
+        if caching:
+            self.cache.put(tenant_id, rag.question, vector, answer, rag.sources)
+        return answer
+
+    async def agenerate(
+        self,
+        client: AsyncOllamaClient,
+        rag: RagPrompt,
+        *,
+        tenant_id: str | None = None,
+        vector: Sequence[float] | None = None,
+    ) -> str:
+        caching = self._caching(rag, tenant_id, vector)
+        if caching:
+            check = self._acheck if self.check is not None else None
+            hit = await self.cache.lookup(tenant_id, vector, check)
+            if hit is not None:
+                return hit.answer
+        answer = await client.generate(
+            rag.prompt,
+            system=rag.system,
+            temperature=0,
+            model=self.model,
+            options=self._options(),
+            keep_alive=self.keep_alive,
+        )
+        if caching:
+            self.cache.put(tenant_id, rag.question, vector, answer, rag.sources)
+        return answer
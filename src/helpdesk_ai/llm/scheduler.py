@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import AsyncIterator, Callable, Iterator
+
+
+class Priority(IntEnum):
+    """Request classes, served strictly in this order."""
+
+    INTERACTIVE = 0
+    QUERY = 1
+    BULK = 2
+
+
+# Requests one Ollama instance works on at once, across all models; the rest
+# wait here in priority order rather than inside the container.
+SLOTS = int(os.getenv("OLLAMA_SCHEDULER_SLOTS", "4"))
+# Waiting requests allowed per class before new ones are turned away.
+QUEUE_LIMITS = {
+    Priority.INTERACTIVE: int(os.getenv("OLLAMA_QUEUE_INTERACTIVE", "64")),
+    Priority.QUERY: int(os.getenv("OLLAMA_QUEUE_QUERY", "256")),
+    Priority.BULK: int(os.getenv("OLLAMA_QUEUE_BULK", "1024")),
+}
+# Starting guess for how long a request holds a slot, refined as they finish.
+INITIAL_SERVICE_TIME = 1.0
+
+_context: ContextVar[tuple[Priority | None, str | None]] = ContextVar(
+    "ollama_schedule", default=(None, None)
+)
+
+
+class SchedulerBusy(Exception):
+    """The queue for a priority class is full; try again after ``retry_after``."""
+
+    def __init__(self, priority: Priority, retry_after: float) -> None:
+        super().__init__(
+            f"{priority.name.lower()} queue is full, retry in {retry_after:.0f}s"
+        )
+        self.priority = priority
+        self.retry_after = retry_after
+
+
+@contextmanager
+def scheduled(
+    priority: Priority | None = None, tenant_id: str | None = None
+) -> Iterator[None]:
+    """Run Ollama calls made inside the block under ``priority`` for a tenant.
+
+    Without it, generations count as interactive and embeddings as queries,
+    and all callers share one anonymous tenant.
+    """
+    token = _context.set((priority, tenant_id))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current(default: Priority) -> tuple[Priority, str]:
+    priority, tenant_id = _context.get()
+    return (default if priority is None else priority), tenant_id or ""
+
+
+@dataclass
+class QueueStats:
+    admitted: int = 0
+    rejected: int = 0
+    waiting: int = 0
+    wait_seconds: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def mean_wait(self) -> float:
+        return self.wait_seconds / self.admitted if self.admitted else 0.0
+
+
+@dataclass(eq=False)
+class _Ticket:
+    priority: Priority
+    tenant_id: str
+    start: float
+    wake: Callable[[], None]
+    enqueued: float
+    granted: bool = False
+    cancelled: bool = False
+
+
+class Scheduler:
+    """Admission control for one Ollama instance.
+
+    At most ``slots`` requests run at once. Waiting requests are served by
+    priority class first and, within a class, by start-time fair queuing over
+    tenants, so one tenant's backlog only delays its own later requests.
+    ``weights`` gives some tenants a larger share (default 1). A class whose
+    queue already holds its limit rejects new requests with
+    :class:`SchedulerBusy` instead of letting them wait out the HTTP timeout.
+    """
+
+    def __init__(
+        self,
+        slots: int = SLOTS,
+        *,
+        queue_limits: dict[Priority, int] | None = None,
+        weights: dict[str, float] | None = None,
+    ) -> None:
+        self.slots = slots
+        self.queue_limits = {**QUEUE_LIMITS, **(queue_limits or {})}
+        self.weights = weights or {}
+        self.stats = {p: QueueStats() for p in Priority}
+        self.busy = 0
+        self._service = INITIAL_SERVICE_TIME
+        self._queues: dict[Priority, list[tuple[float, int, _Ticket]]] = {
+            p: [] for p in Priority
+        }
+        self._vtime = {p: 0.0 for p in Priority}
+        self._finish: dict[Priority, dict[str, float]] = {p: {} for p in Priority}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def retry_after(self, priority: Priority) -> float:
+        """Rough seconds until a new ``priority`` request would get a slot."""
+        with self._lock:
+            return self._retry_after(priority)
+
+    def _retry_after(self, priority: Priority) -> float:
+        # Callers hold the lock.
+        ahead = sum(self.stats[p].waiting for p in Priority if p <= priority)
+        return max(1.0, math.ceil((ahead + 1) * self._service / self.slots))
+
+    def _admit(
+        self, priority: Priority, tenant_id: str, wake: Callable[[], None]
+    ) -> _Ticket | None:
+        """Take a free slot (returns None) or queue a ticket to be woken."""
+        with self._lock:
+            stats = self.stats[priority]
+            if self.busy < self.slots:
+                self.busy += 1
+                stats.admitted += 1
+                return None
+            if stats.waiting >= self.queue_limits[priority]:
+                stats.rejected += 1
+                raise SchedulerBusy(priority, self._retry_after(priority))
+            finish = self._finish[priority]
+            start = max(self._vtime[priority], finish.get(tenant_id, 0.0))
+            finish[tenant_id] = start + 1.0 / self.weights.get(tenant_id, 1.0)
+            ticket = _Ticket(priority, tenant_id, start, wake, time.monotonic())
+            heapq.heappush(self._queues[priority], (start, next(self._seq), ticket))
+            stats.waiting += 1
+            return ticket
+
+    def _next(self) -> _Ticket | None:
+        for priority in Priority:
+            queue = self._queues[priority]
+            while queue:
+                _, _, ticket = heapq.heappop(queue)
+                if ticket.cancelled:
+                    continue
+                self._vtime[priority] = ticket.start
+                if not queue:
+                    # Nobody is backlogged, so past service no longer counts.
+                    self._finish[priority].clear()
+                return ticket
+        return None
+
+    def _release(self, held: float | None = None) -> None:
+        with self._lock:
+            if held is not None:
+                self._service += 0.2 * (held - self._service)
+            self.busy -= 1
+            ticket = self._next()
+            if ticket is not None:
+                self.busy += 1
+                ticket.granted = True
+                stats = self.stats[ticket.priority]
+                waited = time.monotonic() - ticket.enqueued
+                stats.waiting -= 1
+                stats.admitted += 1
+                stats.wait_seconds += waited
+                stats.max_wait = max(stats.max_wait, waited)
+        if ticket is not None:
+            ticket.wake()
+
+    def _cancel(self, ticket: _Ticket) -> None:
+        with self._lock:
+            if not ticket.granted:
+                ticket.cancelled = True
+                self.stats[ticket.priority].waiting -= 1
+                return
+        # Woken just as the caller gave up: pass the slot on.
+        self._release()
+
+    @contextmanager
+    def slot(self, priority: Priority, tenant_id: str = "") -> Iterator[None]:
+        """Hold a slot for the duration of the block (blocking callers)."""
+        event = threading.Event()
+        ticket = self._admit(priority, tenant_id, event.set)
+        if ticket is not None:
+            try:
+                event.wait()
+            except BaseException:
+                self._cancel(ticket)
+                raise
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+    @asynccontextmanager
+    async def aslot(
+        self, priority: Priority, tenant_id: str = ""
+    ) -> AsyncIterator[None]:
+        """Async counterpart of :meth:`slot`."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(
+                lambda: granted.done() or granted.set_result(None)
+            )
+
+        ticket = self._admit(priority, tenant_id, wake)
+        if ticket is not None:
+            try:
+                await granted
+            except BaseException:
+                self._cancel(ticket)
+                raise
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._release(time.monotonic() - started)
+
+
+_schedulers: dict[str, Scheduler] = {}
+_schedulers_lock = threading.Lock()
+
+
+def get_scheduler(base_url: str, backends: int = 1) -> Scheduler:
+    """The process-wide scheduler for an Ollama deployment.
+
+    A deployment of several ``backends`` gets ``SLOTS`` slots for each.
+    """
+    with _schedulers_lock:
+        if base_url not in _schedulers:
+            _schedulers[base_url] = Scheduler(SLOTS * backends)
+        return _schedulers[base_url]
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import threading
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generic,
+    Iterator,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+def request_key(url: str, payload: dict[str, Any]) -> str:
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{url}\0{canonical}".encode()).hexdigest()
+
+
+def coalescable(path: str, payload: dict[str, Any] | None) -> bool:
+    """Whether identical concurrent requests may share one response.
+
+    Embeddings are deterministic; generations only when sampling is off.
+    """
+    if payload is None:
+        return False
+    if path == "/embed":
+        return True
+    if path == "/generate":
+        return payload.get("options", {}).get("temperature") == 0
+    return False
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+
+class _Broadcast(Generic[T]):
+    """One upstream iterator replayed to any number of subscribers.
+
+    A background thread drains the source so a slow or departed subscriber
+    never stalls the others; if every subscriber leaves early the source is
+    closed. The pump may be blocked waiting on the source then, so ``cancel``
+    is called right away from the departing subscriber's thread to cut it off.
+    """
+
+    def __init__(
+        self,
+        source: Iterator[T],
+        on_done: Callable[[], None],
+        cancel: Callable[[], None] | None = None,
+    ) -> None:
+        self.items: list[T] = []
+        self.error: BaseException | None = None
+        self.done = False
+        self.subscribers = 0
+        self._source = source
+        self._on_done = on_done
+        self._cancel = cancel
+        self._cond = threading.Condition()
+        # The source runs on the pump thread under the caller's context, so
+        # scheduling priority and tenant carry over.
+        self._thread = threading.Thread(
+            target=contextvars.copy_context().run, args=(self._pump,), daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _pump(self) -> None:
+        try:
+            for item in self._source:
+                with self._cond:
+                    if self.subscribers == 0 and self.done:
+                        break
+                    self.items.append(item)
+                    self._cond.notify_all()
+        except BaseException as exc:  # re-raised in every subscriber
+            self.error = exc
+        finally:
+            close = getattr(self._source, "close", None)
+            if close is not None:
+                close()
+            with self._cond:
+                self.done = True
+                self._cond.notify_all()
+            self._on_done()
+
+    def subscribe(self) -> Iterator[T]:
+        # Counted now rather than on first ``next()`` so a subscriber that has
+        # not started reading yet still keeps the stream alive.
+        with self._cond:
+            self.subscribers += 1
+        return self._follow()
+
+    def _follow(self) -> Iterator[T]:
+        index = 0
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: index < len(self.items) or self.done)
+                    if index >= len(self.items):
+                        if self.error is not None:
+                            raise self.error
+                        return
+                    item = self.items[index]
+                index += 1
+                yield item
+        finally:
+            with self._cond:
+                self.subscribers -= 1
+                abandoned = self.subscribers == 0 and not self.done
+                if abandoned:
+                    # Tells the pump to stop at the next item.
+                    self.done = True
+            if abandoned and self._cancel is not None:
+                self._cancel()
+
+
+class SingleFlight:
+    """Share one in-flight call among concurrent callers with the same key."""
+
+    def __init__(self) -> None:
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self._streams: dict[str, _Broadcast[Any]] = {}
+
+    def do(self, key: str, fn: Callable[[], T]) -> T:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stream(
+        self,
+        key: str,
+        factory: Callable[[], Iterator[T]],
+        cancel: Callable[[], None] | None = None,
+    ) -> Iterator[T]:
+        """Subscribe to the stream for ``key``, starting it if none is live.
+
+        Late subscribers replay what the stream has produced so far.
+        ``cancel`` belongs to the stream ``factory`` opens and interrupts it
+        once every subscriber has left; it is unused if a stream is live.
+        """
+        with self._lock:
+            broadcast = self._streams.get(key)
+            if broadcast is None or broadcast.done:
+                broadcast = _Broadcast(factory(), lambda: self._forget(key), cancel)
+                self._streams[key] = broadcast
+                broadcast.start()
+            else:
+                self.coalesced += 1
+            return broadcast.subscribe()
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            broadcast = self._streams.get(key)
+            if broadcast is not None and broadcast.done:
+                del self._streams[key]
+
+
+class _AsyncBroadcast(Generic[T]):
+    """Async counterpart of :class:`_Broadcast`, pumped by a task."""
+
+    def __init__(self, source: AsyncIterator[T], on_done: Callable[[], None]) -> None:
+        self.items: list[T] = []
+        self.error: BaseException | None = None
+        self.done = False
+        self.subscribers = 0
+        self._source = source
+        self._on_done = on_done
+        self._cond = asyncio.Condition()
+        self._task = asyncio.ensure_future(self._pump())
+
+    async def _pump(self) -> None:
+        try:
+            async for item in self._source:
+                async with self._cond:
+                    self.items.append(item)
+                    self._cond.notify_all()
+        except asyncio.CancelledError:
+            pass
+        except Exception as exc:  # re-raised in every subscriber
+            self.error = exc
+        finally:
+            aclose = getattr(self._source, "aclose", None)
+            if aclose is not None:
+                await aclose()
+            self.done = True
+            self._on_done()
+            async with self._cond:
+                self._cond.notify_all()
+
+    def subscribe(self) -> AsyncIterator[T]:
+        self.subscribers += 1
+        return self._follow()
+
+    async def _follow(self) -> AsyncIterator[T]:
+        index = 0
+        try:
+            while True:
+                async with self._cond:
+                    await self._cond.wait_for(
+                        lambda: index < len(self.items) or self.done
+                    )
+                if index >= len(self.items):
+                    if self.error is not None:
+                        raise self.error
+                    return
+                item = self.items[index]
+                index += 1
+                yield item
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                self.done = True
+                self._on_done()
+                self._task.cancel()
+
+
+class AsyncSingleFlight:
+    """Async counterpart of :class:`SingleFlight`; bound to one event loop."""
+
+    def __init__(self) -> None:
+        self.coalesced = 0
+        self._calls: dict[str, asyncio.Future[Any]] = {}
+        self._streams: dict[str, _AsyncBroadcast[Any]] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._calls[key] = future
+            future.add_done_callback(lambda f: self._settle(key, f))
+        else:
+            self.coalesced += 1
+        # Shielded so one caller giving up does not cancel the call for the
+        # others; it still finishes if every caller has gone.
+        return await asyncio.shield(future)
+
+    def _settle(self, key: str, future: asyncio.Future[Any]) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+        if not future.cancelled():
+            future.exception()  # mark retrieved when every waiter left
+
+    def stream(
+        self, key: str, factory: Callable[[], AsyncIterator[T]]
+    ) -> AsyncIterator[T]:
+        broadcast = self._streams.get(key)
+        if broadcast is None or broadcast.done:
+            broadcast = _AsyncBroadcast(factory(), lambda: self._forget(key))
+            self._streams[key] = broadcast
+        else:
+            self.coalesced += 1
+        return broadcast.subscribe()
+
+    def _forget(self, key: str) -> None:
+        broadcast = self._streams.get(key)
+        if broadcast is not None and broadcast.done:
+            del self._streams[key]
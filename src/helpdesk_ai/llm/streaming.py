@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Iterator
+
+
+@dataclass
+class StreamStats:
+    """Timing for one streamed generation.
+
+    ``eval_count``/``eval_duration`` come from Ollama's final ``done`` chunk;
+    ``eval_duration`` is reported in nanoseconds. ``started`` is set when the
+    first chunk is requested, which is when a lazily opened stream sends its
+    request.
+    """
+
+    started: float | None = None
+    first_token_at: float | None = None
+    finished_at: float | None = None
+    eval_count: int | None = None
+    eval_duration: int | None = None
+    done_reason: str | None = None
+
+    def start(self) -> None:
+        if self.started is None:
+            self.started = time.perf_counter()
+
+    @property
+    def time_to_first_token(self) -> float | None:
+        if self.first_token_at is None or self.started is None:
+            return None
+        return self.first_token_at - self.started
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        if not self.eval_count or not self.eval_duration:
+            return None
+        return self.eval_count / (self.eval_duration / 1e9)
+
+    def record(self, chunk: dict[str, Any]) -> str:
+        """Update the stats from an NDJSON chunk and return its token text."""
+        if "error" in chunk:
+            raise RuntimeError(f"ollama stream error: {chunk['error']}")
+        token = chunk.get("response", "")
+        if token and self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+        if chunk.get("done"):
+            self.finished_at = time.perf_counter()
+            self.eval_count = chunk.get("eval_count")
+            self.eval_duration = chunk.get("eval_duration")
+            self.done_reason = chunk.get("done_reason")
+        return token
+
+
+class TokenStream:
+    """Iterator over generated tokens.
+
+    Closing the stream (explicitly, via ``with`` or by breaking out of a
+    ``with`` block) closes the upstream HTTP response so Ollama stops
+    generating.
+    """
+
+    def __init__(self, chunks: Iterator[dict[str, Any]]) -> None:
+        self.stats = StreamStats()
+        self._chunks = chunks
+
+    def __iter__(self) -> TokenStream:
+        return self
+
+    def __next__(self) -> str:
+        self.stats.start()
+        while True:
+            token = self.stats.record(next(self._chunks))
+            if token:
+                return token
+
+    def close(self) -> None:
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+
+    def text(self) -> str:
+        return "".join(self)
+
+    def __enter__(self) -> TokenStream:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class AsyncTokenStream:
+    """Async counterpart of :class:`TokenStream`.
+
+    Use ``async with`` so the upstream response is closed as soon as the
+    consumer stops early rather than when the generator is garbage collected.
+    """
+
+    def __init__(self, chunks: AsyncIterator[dict[str, Any]]) -> None:
+        self.stats = StreamStats()
+        self._chunks = chunks
+
+    def __aiter__(self) -> AsyncTokenStream:
+        return self
+
+    async def __anext__(self) -> str:
+        self.stats.start()
+        while True:
+            token = self.stats.record(await self._chunks.__anext__())
+            if token:
+                return token
+
+    async def aclose(self) -> None:
+        aclose = getattr(self._chunks, "aclose", None)
+        if aclose is not None:
+            await aclose()
+
+    async def text(self) -> str:
+        return "".join([token async for token in self])
+
+    async def __aenter__(self) -> AsyncTokenStream:
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
@@ -0,0 +1,372 @@
+"""In-process vector search over memory-mapped per-tenant matrices.
+
+Each tenant's chunks live in a directory of their own: ``vectors.f32`` holds
+unit-length float32 rows back to back, ``rows.jsonl`` the matching
+``[doc_id, chunk_index, text]`` lines, and ``ivf.npz`` the coarse quantizer
+once the tenant is large enough to need one. Appends only add to the end of
+both files; deleting a document rewrites them without its rows.
+
+Small tenants are searched exactly with a blocked matrix multiply. Tenants
+with at least ``ivf_min_rows`` rows are split into about ``sqrt(rows)``
+k-means cells and a query scores only the rows of its ``nprobe`` nearest
+cells.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+DEFAULT_DIR = Path.home() / ".cache" / "helpdesk_ai" / "index"
+# Rows scored per matrix multiply; bounds the temporary score matrix.
+BLOCK_ROWS = 16384
+IVF_MIN_ROWS = int(os.getenv("LOCAL_IVF_MIN_ROWS", "50000"))
+NPROBE = int(os.getenv("LOCAL_IVF_NPROBE", "8"))
+KMEANS_ITERATIONS = 10
+# Training rows sampled per cell.
+KMEANS_SAMPLE = 64
+
+
+def _normalized(vectors: Sequence[Sequence[float]] | np.ndarray) -> np.ndarray:
+    matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Column indices of the ``k`` best scores in each row, best first."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        return np.empty((scores.shape[0], 0), dtype=np.intp)
+    if k < scores.shape[1]:
+        part = np.argpartition(scores, -k, axis=1)[:, -k:]
+    else:
+        part = np.broadcast_to(np.arange(k), (scores.shape[0], k))
+    best = np.take_along_axis(scores, part, axis=1)
+    return np.take_along_axis(part, np.argsort(-best, axis=1), axis=1)
+
+
+def _kmeans(sample: np.ndarray, cells: int, seed: int = 0) -> np.ndarray:
+    """Spherical k-means centroids of unit-length ``sample`` rows."""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), cells, replace=False)].copy()
+    for _ in range(KMEANS_ITERATIONS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = ~sums.any(axis=1)
+        # Re-seed empty cells rather than letting them die.
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = _normalized(sums)
+    return centroids
+
+
+class TenantIndex:
+    """One tenant's rows. Not thread-safe; :class:`LocalIndex` locks it."""
+
+    def __init__(
+        self,
+        path: Path,
+        dimensions: int,
+        *,
+        ivf_min_rows: int = IVF_MIN_ROWS,
+        nprobe: int = NPROBE,
+    ) -> None:
+        self.path = path
+        self.dimensions = dimensions
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self.rows: list[tuple[str, int, str]] = []
+        self._matrix: np.ndarray | None = None
+        self._centroids: np.ndarray | None = None
+        self._cells: np.ndarray | None = None
+        self._trained_rows = 0
+        # Cell assignments changed since ``ivf.npz`` was written.
+        self._ivf_dirty = False
+        self._load()
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.path / "vectors.f32"
+
+    @property
+    def _rows_path(self) -> Path:
+        return self.path / "rows.jsonl"
+
+    @property
+    def _ivf_path(self) -> Path:
+        return self.path / "ivf.npz"
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _load(self) -> None:
+        if self._rows_path.exists():
+            with open(self._rows_path, encoding="utf-8") as f:
+                self.rows = [tuple(json.loads(line)) for line in f if line.strip()]
+        row_bytes = self.dimensions * 4
+        stored = (
+            self._vectors_path.stat().st_size // row_bytes
+            if self._vectors_path.exists()
+            else 0
+        )
+        if stored != len(self.rows):
+            # An append was interrupted between the two files; drop the tail.
+            count = min(stored, len(self.rows))
+            self.rows = self.rows[:count]
+            self._rewrite(np.asarray(self.matrix()[:count]) if count else None)
+        if self._ivf_path.exists():
+            with np.load(self._ivf_path) as ivf:
+                self._centroids = ivf["centroids"]
+                self._cells = ivf["cells"]
+                self._trained_rows = int(ivf["trained_rows"])
+            if len(self._cells) > len(self.rows):
+                self._drop_ivf()
+            elif len(self._cells) < len(self.rows):
+                # Rows appended after the quantizer was last saved.
+                tail = np.asarray(self.matrix()[len(self._cells) :])
+                self._assign(tail)
+
+    def matrix(self) -> np.ndarray:
+        """The tenant's vectors, mapped read-only."""
+        if self._matrix is None:
+            rows = self._vectors_path.stat().st_size // (self.dimensions * 4)
+            self._matrix = (
+                np.memmap(
+                    self._vectors_path, np.float32, "r", shape=(rows, self.dimensions)
+                )
+                if rows
+                else np.empty((0, self.dimensions), np.float32)
+            )
+        return self._matrix
+
+    def append(
+        self,
+        doc_id: str,
+        offset: int,
+        chunks: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        matrix = _normalized(vectors)
+        if matrix.shape != (len(chunks), self.dimensions):
+            raise ValueError(
+                f"expected {len(chunks)} vectors of {self.dimensions} dimensions, "
+                f"got {matrix.shape}"
+            )
+        self.path.mkdir(parents=True, exist_ok=True)
+        # Vectors first: a row without a vector would be unreadable, while a
+        # trailing vector without a row is dropped on load.
+        with open(self._vectors_path, "ab") as f:
+            f.write(matrix.tobytes())
+        with open(self._rows_path, "a", encoding="utf-8") as f:
+            for idx, chunk in enumerate(chunks, start=offset):
+                f.write(json.dumps([doc_id, idx, chunk], ensure_ascii=False) + "\n")
+        self.rows.extend((doc_id, i, c) for i, c in enumerate(chunks, start=offset))
+        self._matrix = None
+        if self._centroids is not None:
+            self._assign(matrix)
+
+    def _assign(self, matrix: np.ndarray) -> None:
+        cells = np.argmax(matrix @ self._centroids.T, axis=1)
+        self._cells = np.concatenate([self._cells, cells])
+        self._ivf_dirty = True
+
+    def delete(self, doc_id: str) -> int:
+        keep = np.array([row[0] != doc_id for row in self.rows], dtype=bool)
+        removed = len(keep) - int(keep.sum())
+        if not removed:
+            return 0
+        kept = np.asarray(self.matrix()[keep])
+        self.rows = [row for row, k in zip(self.rows, keep) if k]
+        self._rewrite(kept)
+        if self._cells is not None:
+            self._cells = self._cells[keep]
+            self._ivf_dirty = True
+        return removed
+
+    def _rewrite(self, matrix: np.ndarray | None) -> None:
+        self._matrix = None
+        tmp = self._vectors_path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            if matrix is not None:
+                f.write(np.ascontiguousarray(matrix, np.float32).tobytes())
+        os.replace(tmp, self._vectors_path)
+        tmp = self._rows_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for row in self.rows:
+                f.write(json.dumps(list(row), ensure_ascii=False) + "\n")
+        os.replace(tmp, self._rows_path)
+
+    def _save_ivf(self) -> None:
+        tmp = self.path / "ivf.tmp.npz"
+        np.savez(
+            tmp,
+            centroids=self._centroids,
+            cells=self._cells,
+            trained_rows=self._trained_rows,
+        )
+        os.replace(tmp, self._ivf_path)
+        self._ivf_dirty = False
+
+    def _drop_ivf(self) -> None:
+        self._centroids = self._cells = None
+        self._trained_rows = 0
+        self._ivf_dirty = False
+        self._ivf_path.unlink(missing_ok=True)
+
+    def train(self) -> None:
+        """(Re)build the coarse quantizer over the current rows."""
+        matrix = self.matrix()
+        cells = max(1, int(math.sqrt(len(matrix))))
+        rng = np.random.default_rng(0)
+        size = min(len(matrix), cells * KMEANS_SAMPLE)
+        sample = np.asarray(
+            matrix[np.sort(rng.choice(len(matrix), size, replace=False))]
+        )
+        self._centroids = _kmeans(sample, cells)
+        self._cells = np.concatenate(
+            [
+                np.argmax(matrix[i : i + BLOCK_ROWS] @ self._centroids.T, axis=1)
+                for i in range(0, len(matrix), BLOCK_ROWS)
+            ]
+        )
+        self._trained_rows = len(matrix)
+        self._save_ivf()
+
+    def maintain(self) -> None:
+        """Train the quantizer once the tenant is large enough and retrain it
+        when the tenant has doubled since, so cells stay balanced; persist
+        assignments of rows added or removed in between."""
+        if len(self) < self.ivf_min_rows:
+            if self._centroids is not None:
+                self._drop_ivf()
+        elif self._centroids is None or len(self) >= 2 * self._trained_rows:
+            self.train()
+        elif self._ivf_dirty:
+            self._save_ivf()
+
+    def search(
+        self, queries: Sequence[Sequence[float]] | np.ndarray, limit: int
+    ) -> list[list[tuple[int, float]]]:
+        """``(row, cosine)`` of the best ``limit`` rows for each query."""
+        queries = _normalized(queries)
+        if not self.rows:
+            return [[] for _ in queries]
+        if self._centroids is not None:
+            return [self._search_ivf(q, limit) for q in queries]
+        matrix = self.matrix()
+        best_rows = np.empty((len(queries), 0), dtype=np.intp)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for start in range(0, len(matrix), BLOCK_ROWS):
+            scores = queries @ np.asarray(matrix[start : start + BLOCK_ROWS]).T
+            idx = top_k(scores, limit)
+            best_rows = np.hstack([best_rows, idx + start])
+            best_scores = np.hstack([best_scores, np.take_along_axis(scores, idx, 1)])
+            keep = top_k(best_scores, limit)
+            best_rows = np.take_along_axis(best_rows, keep, 1)
+            best_scores = np.take_along_axis(best_scores, keep, 1)
+        return [
+            [(int(r), float(s)) for r, s in zip(rows, scores)]
+            for rows, scores in zip(best_rows, best_scores)
+        ]
+
+    def _search_ivf(self, query: np.ndarray, limit: int) -> list[tuple[int, float]]:
+        probes = top_k((self._centroids @ query)[None, :], self.nprobe)[0]
+        rows = np.flatnonzero(np.isin(self._cells, probes))
+        scores = np.asarray(self.matrix()[rows]) @ query
+        best = top_k(scores[None, :], limit)[0]
+        return [(int(rows[i]), float(scores[i])) for i in best]
+
+
+class LocalIndex:
+    """Per-tenant :class:`TenantIndex` directories under ``root``."""
+
+    def __init__(
+        self,
+        root: Path | str,
+        dimensions: int,
+        *,
+        ivf_min_rows: int = IVF_MIN_ROWS,
+        nprobe: int = NPROBE,
+    ) -> None:
+        self.root = Path(root)
+        self.dimensions = dimensions
+        self.ivf_min_rows = ivf_min_rows
+        self.nprobe = nprobe
+        self._tenants: dict[str, TenantIndex] = {}
+        self._locks: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def tenants(self) -> list[str]:
+        if not self.root.exists():
+            return []
+        return sorted(
+            p.name for p in self.root.iterdir() if (p / "rows.jsonl").exists()
+        )
+
+    def _open(
+        self, tenant_id: str, create: bool = True
+    ) -> tuple[TenantIndex, threading.Lock] | None:
+        # Tenant ids are UUIDs; parsing them also keeps paths inside root.
+        key = str(uuid.UUID(tenant_id))
+        with self._lock:
+            if key not in self._tenants:
+                if not create and not (self.root / key).exists():
+                    return None
+                self._tenants[key] = TenantIndex(
+                    self.root / key,
+                    self.dimensions,
+                    ivf_min_rows=self.ivf_min_rows,
+                    nprobe=self.nprobe,
+                )
+                self._locks[key] = threading.Lock()
+            return self._tenants[key], self._locks[key]
+
+    def append(self, tenant_id: str, doc_id: str, offset: int, chunks, vectors) -> None:
+        index, lock = self._open(tenant_id)
+        with lock:
+            index.append(doc_id, offset, chunks, vectors)
+
+    def delete(self, tenant_id: str, doc_id: str) -> int:
+        index, lock = self._open(tenant_id)
+        with lock:
+            return index.delete(doc_id)
+
+    def documents(self, tenant_id: str) -> set[str]:
+        """Ids of the documents ``tenant_id`` has rows for."""
+        opened = self._open(tenant_id, create=False)
+        if opened is None:
+            return set()
+        index, lock = opened
+        with lock:
+            return {row[0] for row in index.rows}
+
+    def maintain(self) -> None:
+        with self._lock:
+            opened = list(self._tenants)
+        for key in opened:
+            index, lock = self._open(key)
+            with lock:
+                index.maintain()
+
+    def search(
+        self,
+        queries: Sequence[Sequence[float]] | np.ndarray,
+        tenant_id: str,
+        limit: int = 5,
+    ) -> list[list[tuple[str, int, str, float]]]:
+        """``(doc_id, chunk_index, text, score)`` hits for each query."""
+        opened = self._open(tenant_id, create=False)
+        if opened is None:
+            return [[] for _ in queries]
+        index, lock = opened
+        with lock:
+            found = index.search(queries, limit)
+            return [[(*index.rows[r], s) for r, s in hits] for hits in found]
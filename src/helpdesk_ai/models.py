@@ -3,9 +3,12 @@ from __future__ import annotations
 import uuid
 from datetime import datetime
 
-from sqlalchemy import ARRAY, DateTime, Float, ForeignKey, String, Text, text
+import numpy as np
+from sqlalchemy import DateTime, ForeignKey, Index, String, Text, text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
+from helpdesk_ai.vector_types import Vector
+
 
 class Base(DeclarativeBase):
     pass
@@ -50,6 +53,16 @@ class Ticket(Base):
     )
     updated_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
+    __table_args__ = (
+        Index(
+            "ix_ticket_tenant_status_priority_created",
+            "tenant_id",
+            "status",
+            "priority",
+            "created_at",
+        ),
+    )
+
 
 class KnowledgeDoc(Base):
     __tablename__ = "knowledge_doc"
@@ -58,21 +71,54 @@ class KnowledgeDoc(Base):
     tenant_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("tenant.id"))
     title: Mapped[str] = mapped_column(String(200), nullable=False)
     path: Mapped[str] = mapped_column(String(255), nullable=False)
-    checksum: Mapped[str] = mapped_column(String(64))
+    # Unset until the document's first successful ingest.
+    checksum: Mapped[str | None] = mapped_column(String(64))
+    chunk_count: Mapped[int | None] = mapped_column()
+    embedding_model: Mapped[str | None] = mapped_column(String(100))
     added_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=text("now()"), nullable=False
     )
 
+    __table_args__ = (
+        # Tenant filter of pgvector searches.
+        Index("ix_knowledge_doc_tenant_model", "tenant_id", "embedding_model"),
+        Index("uq_knowledge_doc_tenant_checksum", "tenant_id", "checksum", unique=True),
+    )
+
 
 class Embedding(Base):
     __tablename__ = "embedding"
 
     id: Mapped[uuid.UUID] = mapped_column(primary_key=True, default=uuid.uuid4)
     doc_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("knowledge_doc.id"))
+    # The document version the chunk was embedded from.
+    checksum: Mapped[str | None] = mapped_column(String(64))
     chunk_index: Mapped[int] = mapped_column(nullable=False)
-    vector: Mapped[list[float]] = mapped_column(ARRAY(Float))
+    # pgvector, read back as a read-only float32 NumPy view (see vector_types).
+    vector: Mapped[np.ndarray | None] = mapped_column(Vector())
+    text: Mapped[str | None] = mapped_column(Text)
     token_count: Mapped[int] = mapped_column()
 
+    __table_args__ = (Index("ix_embedding_doc_chunk", "doc_id", "chunk_index"),)
+
+
+class StoredDoc(Base):
+    """The version of a document one vector store holds.
+
+    ``knowledge_doc`` records the last version loaded into any store; loads
+    into one store skip and replace documents by what that store holds.
+    """
+
+    __tablename__ = "stored_doc"
+
+    doc_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("knowledge_doc.id", ondelete="CASCADE"), primary_key=True
+    )
+    store: Mapped[str] = mapped_column(String(20), primary_key=True)
+    checksum: Mapped[str] = mapped_column(String(64), nullable=False)
+    chunk_count: Mapped[int] = mapped_column(nullable=False)
+    embedding_model: Mapped[str] = mapped_column(String(100), nullable=False)
+
 
 class ChatSession(Base):
     __tablename__ = "chat_session"
@@ -84,3 +130,9 @@ class ChatSession(Base):
         DateTime(timezone=True), server_default=text("now()"), nullable=False
     )
     summary: Mapped[str | None] = mapped_column(Text)
+
+    __table_args__ = (
+        Index(
+            "ix_chat_session_tenant_user_created", "tenant_id", "user_id", "created_at"
+        ),
+    )
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+try:
+    from unstructured.__version__ import __version__ as _unstructured_version
+except ModuleNotFoundError:  # pragma: no cover - optional dependency
+    _unstructured_version = "none"
+
+DEFAULT_DIR = Path.home() / ".cache" / "helpdesk_ai" / "parsed"
+# Bump the leading number when the stored format or element extraction changes.
+PARSER_VERSION = f"1-unstructured-{_unstructured_version}"
+READ_BATCH = 256
+
+
+class ParseCache:
+    """Extracted element texts keyed by file SHA-256 and parser version.
+
+    Each entry is a gzip file of newline-delimited JSON strings, one element
+    per line, so it can be written and read back a batch at a time.
+    """
+
+    def __init__(self, root: Path | str = DEFAULT_DIR, version: str = PARSER_VERSION):
+        self.root = Path(root)
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, checksum: str) -> Path:
+        return self.root / checksum[:2] / f"{checksum}.{self.version}.jsonl.gz"
+
+    def read(
+        self, checksum: str, batch: int = READ_BATCH
+    ) -> Iterator[list[str]] | None:
+        path = self.path(checksum)
+        if not path.exists():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self._iter(path, batch)
+
+    @staticmethod
+    def _iter(path: Path, batch: int) -> Iterator[list[str]]:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            texts: list[str] = []
+            for line in f:
+                texts.append(json.loads(line))
+                if len(texts) >= batch:
+                    yield texts
+                    texts = []
+            if texts:
+                yield texts
+
+    def writer(self, checksum: str) -> CacheWriter:
+        return CacheWriter(self.path(checksum))
+
+    def prune(self, keep: Iterable[str] | None = None) -> int:
+        """Delete entries from other parser versions and, if ``keep`` is given,
+        entries whose checksum is not in it. Returns the number removed."""
+        keep_set = set(keep) if keep is not None else None
+        removed = 0
+        for path in self.root.glob("*/*.jsonl.gz"):
+            checksum, _, rest = path.name.partition(".")
+            stale = rest != f"{self.version}.jsonl.gz"
+            if stale or (keep_set is not None and checksum not in keep_set):
+                path.unlink(missing_ok=True)
+                removed += 1
+                if not any(path.parent.iterdir()):
+                    path.parent.rmdir()
+        for path in self.root.glob("*/*.tmp"):
+            # Leftovers from interrupted runs.
+            if time.time() - path.stat().st_mtime > 3600:
+                path.unlink(missing_ok=True)
+        return removed
+
+
+class CacheWriter:
+    """Append element texts; the entry only appears once the block exits
+    cleanly, so an interrupted parse never leaves a truncated entry."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        self._file: gzip.GzipFile | None = None
+
+    def __enter__(self) -> CacheWriter:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = gzip.open(self._tmp, "wb")
+        return self
+
+    def write(self, texts: Iterable[str]) -> None:
+        assert self._file is not None
+        self._file.write(
+            "".join(json.dumps(t, ensure_ascii=False) + "\n" for t in texts).encode()
+        )
+
+    def __exit__(self, exc_type: object, *exc_info: object) -> None:
+        assert self._file is not None
+        self._file.close()
+        if exc_type is None:
+            os.replace(self._tmp, self.path)
+        else:
+            self._tmp.unlink(missing_ok=True)
+
+
+def default_parse_cache() -> ParseCache | None:
+    """Cache under ``PARSE_CACHE_DIR``; ``off`` disables it."""
+    setting = os.getenv("PARSE_CACHE_DIR", str(DEFAULT_DIR))
+    if setting.lower() in {"", "off", "none"}:
+        return None
+    return ParseCache(setting)
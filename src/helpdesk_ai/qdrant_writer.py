@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Hashable, Iterable
+
+import grpc
+import httpx
+from qdrant_client import QdrantClient
+from qdrant_client.common.client_exceptions import ResourceExhaustedResponse
+from qdrant_client.http.exceptions import ResponseHandlingException, UnexpectedResponse
+from qdrant_client.models import PointStruct, SparseVector
+
+MAX_BATCH_POINTS = 256
+MAX_BATCH_BYTES = 8 * 1024**2
+PARALLEL = 4
+MAX_ATTEMPTS = 3
+# Rough JSON size of one float32 component, e.g. ``-0.012345678,``.
+_BYTES_PER_COMPONENT = 14
+# A sparse entry is an index and a value.
+_BYTES_PER_SPARSE = 24
+# gRPC counterparts of a transport error, a 5xx and a 429.
+_RETRYABLE_CODES = {
+    grpc.StatusCode.UNAVAILABLE,
+    grpc.StatusCode.DEADLINE_EXCEEDED,
+    grpc.StatusCode.RESOURCE_EXHAUSTED,
+}
+
+
+def _retryable(exc: Exception) -> bool:
+    if isinstance(exc, ResourceExhaustedResponse):
+        return True
+    if isinstance(exc, UnexpectedResponse):
+        code = exc.status_code or 0
+        return code >= 500 or code == 429
+    if isinstance(exc, ResponseHandlingException):
+        return isinstance(exc.source, httpx.TransportError)
+    if isinstance(exc, grpc.RpcError):
+        return exc.code() in _RETRYABLE_CODES
+    return isinstance(exc, httpx.TransportError)
+
+
+def point_size(point: PointStruct) -> int:
+    """Approximate request bytes ``point`` adds to a REST upsert body."""
+    vector = point.vector
+    components = len(vector) if isinstance(vector, list) else 0
+    if isinstance(vector, dict):
+        components = sum(len(v) for v in vector.values() if isinstance(v, list))
+        components += sum(
+            len(v.indices) * _BYTES_PER_SPARSE // _BYTES_PER_COMPONENT
+            for v in vector.values()
+            if isinstance(v, SparseVector)
+        )
+    payload = json.dumps(point.payload or {}, ensure_ascii=False)
+    return components * _BYTES_PER_COMPONENT + len(payload.encode()) + 64
+
+
+@dataclass
+class _Batch:
+    points: list[PointStruct] = field(default_factory=list)
+    owners: set[Hashable] = field(default_factory=set)
+    size: int = 0
+
+
+@dataclass
+class WriterStats:
+    batches: int = 0
+    points: int = 0
+    retries: int = 0
+    failed_batches: int = 0
+
+
+class PointWriter:
+    """Group points from many documents into size-bounded upsert batches.
+
+    Batches are capped by point count and approximate body size and sent from
+    a thread pool. With ``wait=False`` Qdrant acknowledges each batch once it
+    is in the WAL; :meth:`barrier` then re-sends the final batch with
+    ``wait=True``, which returns only after every earlier update has been
+    applied. A batch failing on a transport error, a 5xx or a 429 is retried
+    on its own; if it still fails, the owners of its points are reported by
+    :meth:`barrier` so callers can redo just those documents. Any other error
+    is a bad request that no retry fixes and is raised.
+    """
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        collection: str,
+        *,
+        max_points: int = MAX_BATCH_POINTS,
+        max_bytes: int = MAX_BATCH_BYTES,
+        parallel: int = PARALLEL,
+        wait: bool = False,
+    ) -> None:
+        self.client = client
+        self.collection = collection
+        self.max_points = max_points
+        self.max_bytes = max_bytes
+        self.wait = wait
+        self.stats = WriterStats()
+        self.parallel = parallel
+        self._pool = ThreadPoolExecutor(max_workers=parallel)
+        self._lock = threading.Lock()
+        self._pending: list[tuple[_Batch, Future[None]]] = []
+        self._failed: set[Hashable] = set()
+        self._buffer = _Batch()
+        self._last: _Batch | None = None
+
+    def write(self, points: Iterable[PointStruct], owner: Hashable = None) -> None:
+        for point in points:
+            size = point_size(point)
+            if self._buffer.points and (
+                len(self._buffer.points) >= self.max_points
+                or self._buffer.size + size > self.max_bytes
+            ):
+                self._submit()
+            self._buffer.points.append(point)
+            self._buffer.owners.add(owner)
+            self._buffer.size += size
+
+    def _submit(self) -> None:
+        batch, self._buffer = self._buffer, _Batch()
+        if not batch.points:
+            return
+        # Bound the batches held in memory: block on the oldest one once
+        # ``2 * parallel`` are in flight.
+        self._reap(limit=2 * self.parallel - 1)
+        self._pending.append((batch, self._pool.submit(self._send, batch)))
+        self._last = batch
+
+    def _reap(self, limit: int) -> None:
+        while self._pending and (
+            len(self._pending) > limit or self._pending[0][1].done()
+        ):
+            batch, future = self._pending.pop(0)
+            exc = future.exception()
+            if exc is not None:
+                if not _retryable(exc):
+                    raise exc
+                self.stats.failed_batches += 1
+                self._failed |= batch.owners
+
+    def _send(self, batch: _Batch, wait: bool | None = None) -> None:
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                self.client.upsert(
+                    collection_name=self.collection,
+                    points=batch.points,
+                    wait=self.wait if wait is None else wait,
+                )
+                with self._lock:
+                    self.stats.batches += 1
+                    self.stats.points += len(batch.points)
+                return
+            except Exception as exc:
+                if not _retryable(exc) or attempt == MAX_ATTEMPTS - 1:
+                    raise
+                with self._lock:
+                    self.stats.retries += 1
+                time.sleep(random.uniform(0, 0.5 * 2**attempt))
+
+    def barrier(self) -> set[Hashable]:
+        """Flush, wait for every batch and return owners of failed batches."""
+        self._submit()
+        self._reap(limit=0)
+        failed, self._failed = self._failed, set()
+        if not self.wait and self._last is not None:
+            try:
+                self._send(self._last, wait=True)
+            except Exception as exc:
+                if not _retryable(exc):
+                    raise
+                failed |= self._last.owners
+        self._last = None
+        return failed
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self) -> PointWriter:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Mapping, Sequence
+
+import httpx
+
+TTL = 2.0
+PROBE_TIMEOUT = httpx.Timeout(2.0)
+
+
+class ReadinessProbe:
+    """Probe backend health endpoints concurrently and remember the answer.
+
+    Results are reused for ``ttl`` seconds, and callers arriving while a probe
+    is running wait on that probe instead of starting another, so readiness
+    traffic costs at most one request per backend per ``ttl``. A target may
+    list several URLs (replicas); it is healthy if any of them is.
+    """
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        targets: Mapping[str, str | Sequence[str]],
+        *,
+        ttl: float = TTL,
+        timeout: httpx.Timeout = PROBE_TIMEOUT,
+    ) -> None:
+        self.client = client
+        self.targets = {
+            name: [url] if isinstance(url, str) else list(url)
+            for name, url in targets.items()
+        }
+        self.ttl = ttl
+        self.timeout = timeout
+        self.probes = 0
+        self._result: dict[str, bool] | None = None
+        self._checked_at = 0.0
+        self._inflight: asyncio.Task[dict[str, bool]] | None = None
+
+    async def _probe_url(self, url: str) -> bool:
+        try:
+            resp = await self.client.get(url, timeout=self.timeout)
+        except httpx.HTTPError:
+            return False
+        return resp.is_success
+
+    async def _probe_one(self, urls: list[str]) -> bool:
+        return any(await asyncio.gather(*(self._probe_url(u) for u in urls)))
+
+    async def _probe(self) -> dict[str, bool]:
+        self.probes += 1
+        names = list(self.targets)
+        results = await asyncio.gather(
+            *(self._probe_one(self.targets[name]) for name in names)
+        )
+        self._result = dict(zip(names, results))
+        self._checked_at = time.monotonic()
+        return self._result
+
+    async def check(self) -> dict[str, bool]:
+        """Per-target health, from cache if it is younger than ``ttl``."""
+        if self._result is not None and time.monotonic() - self._checked_at < self.ttl:
+            return self._result
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.ensure_future(self._probe())
+        # Shielded so a caller that gives up does not cancel the shared probe.
+        return await asyncio.shield(self._inflight)
@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import uuid
 from datetime import datetime
+from typing import Literal
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 
 class TenantSchema(BaseModel):
@@ -40,6 +41,8 @@ class KnowledgeDocSchema(BaseModel):
     title: str
     path: str
     checksum: str | None = None
+    chunk_count: int | None = None
+    embedding_model: str | None = None
     added_at: datetime | None = None
 
 
@@ -57,3 +60,21 @@ class ChatSessionSchema(BaseModel):
     user_id: uuid.UUID
     created_at: datetime | None = None
     summary: str | None = None
+
+
+class SearchRequest(BaseModel):
+    tenant_id: uuid.UUID
+    query: str = Field(min_length=1)
+    top_k: int = Field(default=5, ge=1, le=50)
+    mode: Literal["hybrid", "dense", "lexical"] = "hybrid"
+
+
+class SearchHit(BaseModel):
+    doc_id: str | None = None
+    chunk_index: int | None = None
+    text: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    hits: list[SearchHit]
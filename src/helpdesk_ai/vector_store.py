@@ -0,0 +1,500 @@
+"""Where chunk vectors live: Qdrant, Postgres with pgvector, or local files.
+
+``load_docs`` writes and deletes through a :class:`VectorStore` and the search
+tests and benchmarks query through one, so the backends can be swapped with
+``VECTOR_STORE`` (or ``load_docs --store``) and compared on the same data.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Hashable, Sequence
+
+from qdrant_client import QdrantClient
+from qdrant_client.models import (
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    MatchValue,
+    PointStruct,
+)
+from sqlalchemy import (
+    Float,
+    bindparam,
+    cast,
+    delete,
+    func,
+    insert,
+    literal_column,
+    select,
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from helpdesk_ai.collection import (
+    SPARSE_VECTOR,
+    current_documents,
+    ensure_collection,
+    search,
+)
+from helpdesk_ai.lexical import document_vector
+from helpdesk_ai.llm.embedding_models import EMBEDDING_MODEL, EmbeddingModel
+from helpdesk_ai.llm.prompt import estimate_tokens
+from helpdesk_ai.local_index import DEFAULT_DIR, LocalIndex
+from helpdesk_ai.models import Embedding, KnowledgeDoc, StoredDoc
+from helpdesk_ai.qdrant_writer import PointWriter, WriterStats
+from helpdesk_ai.vector_types import Vector
+
+STORES = ("qdrant", "pgvector", "local")
+VECTOR_STORE = os.getenv("VECTOR_STORE", "qdrant").lower()
+QDRANT_URL = os.getenv("QDRANT_URL", "http://localhost:6333")
+LOCAL_INDEX_DIR = Path(os.getenv("LOCAL_INDEX_DIR", str(DEFAULT_DIR)))
+# Rows per INSERT when writing embeddings to Postgres.
+PG_BATCH_ROWS = 500
+# HNSW candidate list per query; pgvector's default is 40.
+PG_EF_SEARCH = int(os.getenv("PG_EF_SEARCH", "100"))
+# pgvector cannot build HNSW indexes over more dimensions than this.
+PG_MAX_INDEXED_DIMS = 2000
+
+
+@dataclass(frozen=True)
+class DocRef:
+    """One version of a document: its tenant, file checksum and row id.
+
+    ``record_id`` is the ``knowledge_doc`` row; the Postgres store keys
+    embeddings by it, Qdrant points are keyed by tenant and checksum.
+    """
+
+    tenant_id: str
+    checksum: str | None
+    record_id: uuid.UUID | None = None
+
+
+@dataclass
+class Hit:
+    """A search result; ``doc_id`` is the document checksum in every store."""
+
+    doc_id: str
+    chunk_index: int
+    text: str
+    score: float
+
+
+class VectorStore(ABC):
+    """Chunk vectors of one embedding model, partitioned by tenant.
+
+    Writes may be buffered; :meth:`barrier` waits for them and returns the
+    documents that could not be stored.
+    """
+
+    name: str
+    model: EmbeddingModel
+    stats: WriterStats
+    # Chunks are keyed by tenant and checksum, so rows with the same content
+    # share them; False if they are kept per ``record_id``.
+    shares_chunks: bool = True
+
+    @abstractmethod
+    def ensure(self) -> bool:
+        """Create the storage if needed; True if it was (re)created empty."""
+
+    @abstractmethod
+    def write(
+        self,
+        doc: DocRef,
+        offset: int,
+        chunks: Sequence[str],
+        vectors: Sequence[Sequence[float]],
+    ) -> None:
+        """Store chunks ``offset``, ``offset + 1``, ... of ``doc``."""
+
+    def barrier(self) -> set[Hashable]:
+        return set()
+
+    @abstractmethod
+    def delete(self, doc: DocRef) -> None:
+        """Remove every chunk of ``doc``."""
+
+    @abstractmethod
+    def search(
+        self,
+        vector: Sequence[float] | None,
+        tenant_id: str,
+        *,
+        text: str | None = None,
+        limit: int = 5,
+    ) -> list[Hit]:
+        """Best chunks of ``tenant_id``'s documents, best first."""
+
+    @abstractmethod
+    def current(self, tenant_id: str, checksums: set[str]) -> set[str]:
+        """The subset of ``checksums`` the store holds for ``tenant_id``."""
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> VectorStore:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+
+def qdrant_points(
+    doc: DocRef,
+    offset: int,
+    chunks: Sequence[str],
+    vectors: Sequence[Sequence[float]],
+) -> list[PointStruct]:
+    points = []
+    for idx, (chunk, vec) in enumerate(zip(chunks, vectors), start=offset):
+        vector: dict[str, object] = {"": list(vec)}
+        sparse = document_vector(chunk)
+        if sparse is not None:
+            vector[SPARSE_VECTOR] = sparse
+        points.append(
+            PointStruct(
+                # Qdrant requires point IDs to be a valid UUID or an integer.
+                # Use a deterministic UUID derived from the tenant, checksum and
+                # index so the same file ingested for two tenants cannot clash.
+                id=str(
+                    uuid.uuid5(
+                        uuid.NAMESPACE_DNS, f"{doc.tenant_id}-{doc.checksum}-{idx}"
+                    )
+                ),
+                vector=vector,
+                payload={
+                    "tenant_id": doc.tenant_id,
+                    "doc_id": doc.checksum,
+                    "chunk_index": idx,
+                    "text": chunk,
+                },
+            )
+        )
+    return points
+
+
+class QdrantStore(VectorStore):
+    """The model's Qdrant collection, with hybrid dense + BM25 search."""
+
+    name = "qdrant"
+
+    def __init__(
+        self,
+        client: QdrantClient,
+        model: EmbeddingModel = EMBEDDING_MODEL,
+        *,
+        wait: bool = False,
+        recreate: bool = False,
+    ) -> None:
+        self.client = client
+        self.model = model
+        self.recreate = recreate
+        self.collection = model.collection
+        self.writer = PointWriter(client, self.collection, wait=wait)
+        self.stats = self.writer.stats
+
+    def ensure(self) -> bool:
+        return ensure_collection(self.client, model=self.model, recreate=self.recreate)
+
+    def write(self, doc, offset, chunks, vectors) -> None:
+        self.writer.write(qdrant_points(doc, offset, chunks, vectors), owner=doc)
+
+    def barrier(self) -> set[Hashable]:
+        return self.writer.barrier()
+
+    def delete(self, doc: DocRef) -> None:
+        if doc.checksum is None:
+            return
+        self.client.delete(
+            collection_name=self.collection,
+            points_selector=FilterSelector(
+                filter=Filter(
+                    must=[
+                        FieldCondition(
+                            key="tenant_id", match=MatchValue(value=doc.tenant_id)
+                        ),
+                        FieldCondition(
+                            key="doc_id", match=MatchValue(value=doc.checksum)
+                        ),
+                    ]
+                )
+            ),
+        )
+
+    def search(self, vector, tenant_id, *, text=None, limit=5) -> list[Hit]:
+        points = search(
+            self.client, vector, tenant_id, text=text, limit=limit, name=self.collection
+        )
+        return [
+            Hit(
+                doc_id=p.payload["doc_id"],
+                chunk_index=p.payload["chunk_index"],
+                text=p.payload.get("text", ""),
+                score=p.score,
+            )
+            for p in points
+        ]
+
+    def current(self, tenant_id: str, checksums: set[str]) -> set[str]:
+        return current_documents(
+            self.client, tenant_id, checksums, name=self.collection
+        )
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class PgVectorStore(VectorStore):
+    """The ``embedding`` table, searched through its per-dimension HNSW indexes.
+
+    Embeddings hang off ``knowledge_doc`` rows, so documents must be recorded
+    (at least as a stub) before their chunks are written, and a document row
+    holds one model's embeddings at a time. Chunks carry the checksum of the
+    version they came from, and search joins ``knowledge_doc`` on its tenant
+    index and the store's ``stored_doc`` rows, so only the model and version
+    the store holds are found while a new version is written. It is dense
+    only; the ``text`` of a query is ignored.
+
+    Writes are synchronous, one transaction per call; a failed write is
+    reported by the next :meth:`barrier`.
+    """
+
+    name = "pgvector"
+    shares_chunks = False
+
+    def __init__(
+        self,
+        engine: Engine,
+        model: EmbeddingModel = EMBEDDING_MODEL,
+        *,
+        batch_rows: int = PG_BATCH_ROWS,
+        ef_search: int = PG_EF_SEARCH,
+    ) -> None:
+        self.engine = engine
+        self.model = model
+        self.batch_rows = batch_rows
+        self.ef_search = ef_search
+        self.stats = WriterStats()
+        self._failed: set[Hashable] = set()
+        self._lock = threading.Lock()
+        dim = model.dimensions
+        # Must match the indexed expression of the migration's partial indexes.
+        indexed = cast(Embedding.vector, Vector(dim))
+        distance = indexed.op("<=>", return_type=Float())(
+            bindparam("q", type_=Vector(dim))
+        ).label("distance")
+        self._query = (
+            select(StoredDoc.checksum, Embedding.chunk_index, Embedding.text, distance)
+            .join(KnowledgeDoc, KnowledgeDoc.id == Embedding.doc_id)
+            .join(
+                StoredDoc,
+                (StoredDoc.doc_id == Embedding.doc_id)
+                & (StoredDoc.store == self.name)
+                & (StoredDoc.checksum == Embedding.checksum),
+            )
+            .where(
+                KnowledgeDoc.tenant_id == bindparam("tenant_id"),
+                StoredDoc.embedding_model == model.name,
+                # Inlined so the planner can match the partial index predicate.
+                func.vector_dims(Embedding.vector) == literal_column(str(dim)),
+            )
+            .order_by(distance)
+            .limit(bindparam("limit"))
+        )
+
+    def ensure(self) -> bool:
+        # The table and its indexes belong to the Alembic migrations.
+        if self.model.dimensions > PG_MAX_INDEXED_DIMS:
+            print(
+                f"Warning: {self.model.name} has {self.model.dimensions} dimensions; "
+                f"pgvector searches them without an index."
+            )
+        return False
+
+    def write(self, doc, offset, chunks, vectors) -> None:
+        if doc.record_id is None:
+            raise ValueError("pgvector writes need the document's knowledge_doc id")
+        rows = [
+            {
+                "doc_id": doc.record_id,
+                "checksum": doc.checksum,
+                "chunk_index": idx,
+                "vector": vec,
+                "text": chunk,
+                "token_count": estimate_tokens(chunk),
+            }
+            for idx, (chunk, vec) in enumerate(zip(chunks, vectors), start=offset)
+        ]
+        for start in range(0, len(rows), self.batch_rows):
+            batch = rows[start : start + self.batch_rows]
+            try:
+                with self.engine.begin() as conn:
+                    conn.execute(insert(Embedding), batch)
+            except SQLAlchemyError as exc:
+                print(f"Warning: embedding insert failed: {exc}")
+                with self._lock:
+                    self.stats.failed_batches += 1
+                    self._failed.add(doc)
+                continue
+            with self._lock:
+                self.stats.batches += 1
+                self.stats.points += len(batch)
+
+    def barrier(self) -> set[Hashable]:
+        with self._lock:
+            failed, self._failed = self._failed, set()
+        return failed
+
+    def delete(self, doc: DocRef) -> None:
+        statement = delete(Embedding).where(Embedding.checksum == doc.checksum)
+        if doc.record_id is not None:
+            statement = statement.where(Embedding.doc_id == doc.record_id)
+        else:
+            statement = statement.where(
+                Embedding.doc_id.in_(
+                    select(KnowledgeDoc.id).where(
+                        KnowledgeDoc.tenant_id == uuid.UUID(doc.tenant_id)
+                    )
+                )
+            )
+        with self.engine.begin() as conn:
+            conn.execute(statement)
+
+    def search(self, vector, tenant_id, *, text=None, limit=5) -> list[Hit]:
+        if vector is None:
+            raise ValueError("the pgvector store only supports dense search")
+        with self.engine.begin() as conn:
+            if self.model.dimensions <= PG_MAX_INDEXED_DIMS:
+                # Keep scanning the index until enough rows pass the tenant
+                # filter instead of returning fewer than ``limit``.
+                conn.exec_driver_sql("SET LOCAL hnsw.iterative_scan = strict_order")
+                conn.exec_driver_sql(f"SET LOCAL hnsw.ef_search = {self.ef_search:d}")
+            rows = conn.execute(
+                self._query,
+                {"q": vector, "tenant_id": uuid.UUID(tenant_id), "limit": limit},
+            )
+            return [
+                Hit(
+                    doc_id=row.checksum,
+                    chunk_index=row.chunk_index,
+                    text=row.text or "",
+                    score=1.0 - row.distance,
+                )
+                for row in rows
+            ]
+
+    def current(self, tenant_id: str, checksums: set[str]) -> set[str]:
+        if not checksums:
+            return set()
+        statement = (
+            select(StoredDoc.checksum)
+            .join(KnowledgeDoc, KnowledgeDoc.id == StoredDoc.doc_id)
+            .where(
+                KnowledgeDoc.tenant_id == uuid.UUID(tenant_id),
+                StoredDoc.store == self.name,
+                StoredDoc.embedding_model == self.model.name,
+                StoredDoc.checksum.in_(sorted(checksums)),
+            )
+        )
+        with self.engine.connect() as conn:
+            return set(conn.scalars(statement))
+
+    def close(self) -> None:
+        self.barrier()
+
+
+class LocalStore(VectorStore):
+    """In-process search over memory-mapped files (see :mod:`helpdesk_ai.local_index`).
+
+    Meant for tenants small enough that a network hop costs more than the
+    search, and as a stand-in for Qdrant where no server runs. Like the
+    pgvector store it is dense only. Writes go straight to disk; the IVF
+    quantizer of large tenants is (re)trained on :meth:`barrier`.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        root: Path | str = LOCAL_INDEX_DIR,
+        model: EmbeddingModel = EMBEDDING_MODEL,
+        **index_options: int,
+    ) -> None:
+        self.model = model
+        self.index = LocalIndex(
+            Path(root) / model.collection, model.dimensions, **index_options
+        )
+        self.stats = WriterStats()
+
+    def ensure(self) -> bool:
+        self.index.root.mkdir(parents=True, exist_ok=True)
+        return not self.index.tenants()
+
+    def write(self, doc, offset, chunks, vectors) -> None:
+        self.index.append(doc.tenant_id, doc.checksum, offset, chunks, vectors)
+        self.stats.batches += 1
+        self.stats.points += len(chunks)
+
+    def barrier(self) -> set[Hashable]:
+        self.index.maintain()
+        return set()
+
+    def delete(self, doc: DocRef) -> None:
+        if doc.checksum is not None:
+            self.index.delete(doc.tenant_id, doc.checksum)
+
+    def search(self, vector, tenant_id, *, text=None, limit=5) -> list[Hit]:
+        if vector is None:
+            raise ValueError("the local store only supports dense search")
+        return self.search_many([vector], tenant_id, limit=limit)[0]
+
+    def current(self, tenant_id: str, checksums: set[str]) -> set[str]:
+        return checksums & self.index.documents(tenant_id)
+
+    def search_many(
+        self, vectors: Sequence[Sequence[float]], tenant_id: str, *, limit: int = 5
+    ) -> list[list[Hit]]:
+        """:meth:`search` for several queries with one matrix multiply."""
+        return [
+            [Hit(*hit) for hit in hits]
+            for hits in self.index.search(vectors, tenant_id, limit)
+        ]
+
+    def close(self) -> None:
+        self.index.maintain()
+
+
+def open_store(
+    kind: str = VECTOR_STORE,
+    model: EmbeddingModel = EMBEDDING_MODEL,
+    *,
+    qdrant: QdrantClient | None = None,
+    engine: Engine | None = None,
+    wait: bool = False,
+    recreate: bool = False,
+) -> VectorStore:
+    """A ``kind`` store for ``model``, opening a Qdrant client if none is given.
+
+    ``recreate`` lets a Qdrant collection with an outdated layout be dropped
+    and created again empty.
+    """
+    if kind == "qdrant":
+        return QdrantStore(
+            qdrant or QdrantClient(url=QDRANT_URL),
+            model,
+            wait=wait,
+            recreate=recreate,
+        )
+    if kind == "pgvector":
+        if engine is None:
+            raise ValueError("the pgvector store needs a database engine")
+        return PgVectorStore(engine, model)
+    if kind == "local":
+        return LocalStore(LOCAL_INDEX_DIR, model)
+    raise ValueError(f"unknown vector store {kind!r}; expected one of {STORES}")
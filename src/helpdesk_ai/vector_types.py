@@ -0,0 +1,70 @@
+"""SQLAlchemy types for pgvector columns.
+
+Values are written in pgvector's text form and read through ``vector_send``,
+pgvector's binary wire format: a 2-byte dimension count, 2 unused bytes and
+big-endian float32s. :class:`Vector` results are NumPy views straight over
+those bytes, so reading a row does not build a Python float per element.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+import numpy as np
+from sqlalchemy import cast, func
+from sqlalchemy.types import LargeBinary, TypeDecorator, UserDefinedType
+
+# vector_send layout: int16 dims, int16 unused, then float4 big-endian.
+_HEADER = 4
+WIRE_DTYPE = np.dtype(">f4")
+
+
+def to_text(vector: Sequence[float] | np.ndarray) -> str:
+    """pgvector's input format, e.g. ``[0.1,0.2]``, at float32 precision."""
+    values = np.asarray(vector, dtype=np.float32)
+    if values.ndim != 1:
+        raise ValueError(f"expected a 1-d vector, got shape {values.shape}")
+    # str() of a float32 is its shortest round-tripping form.
+    return "[" + ",".join(map(str, values)) + "]"
+
+
+def from_wire(data: bytes | memoryview) -> np.ndarray:
+    """Read-only float32 view over a ``vector_send`` value."""
+    return np.frombuffer(data, dtype=WIRE_DTYPE, offset=_HEADER)
+
+
+class _VectorWire(TypeDecorator):
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_result_value(self, value: Any, dialect: Any) -> np.ndarray | None:
+        return None if value is None else from_wire(value)
+
+
+class Vector(UserDefinedType):
+    """A pgvector ``vector`` column mapped to NumPy float32 arrays.
+
+    ``dim`` fixes the column's dimensions; leave it out to allow vectors of
+    several embedding models in one column (indexes are then partial, one per
+    dimension).
+    """
+
+    cache_ok = True
+
+    def __init__(self, dim: int | None = None) -> None:
+        self.dim = dim
+
+    def get_col_spec(self, **kw: Any) -> str:
+        return "vector" if self.dim is None else f"vector({self.dim})"
+
+    def bind_processor(self, dialect: Any):
+        def process(value: Any) -> str | None:
+            return None if value is None else to_text(value)
+
+        return process
+
+    def bind_expression(self, bindvalue: Any):
+        return cast(bindvalue, self)
+
+    def column_expression(self, column: Any):
+        return func.vector_send(column, type_=_VectorWire())
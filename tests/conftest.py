@@ -35,7 +35,14 @@ def wait_for_services(services: Iterable[str], infra_dir: str = "infra") -> None
         wait_for_container_healthy(svc, infra_dir=infra_dir)
 
 
-@pytest.fixture(scope="session", autouse=True)
+@pytest.fixture(autouse=True)
+def services(request):
+    """Start the compose stack for tests marked slow; unit tests run without it."""
+    if request.node.get_closest_marker("slow"):
+        request.getfixturevalue("warm_ollama")
+
+
+@pytest.fixture(scope="session")
 def warm_ollama(ensure_services):
     httpx.post(
         "http://localhost:11434/api/generate",
@@ -44,7 +51,7 @@ def warm_ollama(ensure_services):
     ).raise_for_status()
 
 
-@pytest.fixture(scope="session", autouse=True)
+@pytest.fixture(scope="session")
 def ensure_services() -> None:
     if shutil.which("docker") is None:
         pytest.skip("docker not available")
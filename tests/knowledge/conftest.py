@@ -0,0 +1,84 @@
+import hashlib
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from helpdesk_ai.llm.embedding_models import EMBEDDING_MODEL
+
+
+def stub_embedding(text: str) -> list[float]:
+    """A hashed bag of words: texts sharing words point the same way."""
+    vec = np.zeros(EMBEDDING_MODEL.dimensions, dtype=np.float32)
+    for word in re.findall(r"\w+", text.lower()):
+        digest = hashlib.blake2b(word.encode(), digest_size=8).digest()
+        vec[int.from_bytes(digest, "little") % len(vec)] += 1.0
+    norm = np.linalg.norm(vec)
+    return (vec / norm if norm else vec).tolist()
+
+
+@pytest.fixture
+def local_store(tmp_path):
+    """The demo docs in a local store, with stub embeddings and no database.
+
+    Only the Markdown docs are loaded; the PDF needs unstructured's extras.
+    """
+    from helpdesk_ai.vector_store import DocRef, LocalStore
+    from scripts.load_docs import _chunks, _sha256
+
+    seed = json.load(open("scripts/seed_manifest.json"))
+    with LocalStore(tmp_path, EMBEDDING_MODEL) as store:
+        store.ensure()
+        for entry in json.load(open("scripts/demo_docs.json")):
+            path = Path(entry["path"])
+            if path.suffix != ".md":
+                continue
+            chunks = _chunks(path.read_text())
+            ref = DocRef(seed["tenants"][entry["tenant"]], _sha256(path))
+            store.write(ref, 0, chunks, [stub_embedding(c) for c in chunks])
+        store.barrier()
+        yield store
+
+
+@pytest.fixture(
+    params=[
+        pytest.param("qdrant", marks=pytest.mark.slow),
+        pytest.param("pgvector", marks=pytest.mark.slow),
+        "local",
+    ]
+)
+def loaded_store(request):
+    """The demo docs loaded into each vector store in turn.
+
+    The Qdrant and pgvector stores are filled by ``load_manifest`` and need the
+    compose stack; the local one is :func:`local_store`.
+    """
+    if request.param == "local":
+        yield request.getfixturevalue("local_store")
+        return
+    pytest.importorskip("qdrant_client")
+    pytest.importorskip("httpx")
+    from sqlalchemy import create_engine
+
+    from helpdesk_ai.vector_store import open_store
+    from scripts.load_docs import DATABASE_URL, load_manifest
+
+    seed = json.load(open("scripts/seed_manifest.json"))
+    load_manifest(Path("scripts/demo_docs.json"), seed["tenants"], store=request.param)
+    engine = create_engine(DATABASE_URL)
+    with open_store(request.param, engine=engine) as store:
+        yield store
+    engine.dispose()
+
+
+@pytest.fixture
+def embed_query(request, loaded_store):
+    """Embeds a search query the way ``loaded_store``'s documents were."""
+    if request.node.callspec.params["loaded_store"] == "local":
+        return stub_embedding
+    from helpdesk_ai.llm.ollama_client import OllamaClient
+
+    client = OllamaClient()
+    return lambda text: client.embed(EMBEDDING_MODEL.query(text))
@@ -5,10 +5,20 @@ import pytest
 pytest.importorskip("unstructured.partition.auto")
 pytest.importorskip("langchain_text_splitters")
 
-from scripts.load_docs import _chunks, _load_text  # noqa: E402
+from scripts.load_docs import _chunks, _iter_chunks, _load_text  # noqa: E402
 
 
 def test_chunk_counts():
     text = _load_text(Path("docs/sample_docs/sample.pdf"))
     chunks = _chunks(text)
     assert len(chunks) >= 2
+
+
+def test_streamed_chunks_match_bounds():
+    elements = [f"paragraph {i} " * 30 for i in range(200)]
+    streamed = list(_iter_chunks(iter(elements)))
+    assert all(len(c) <= 512 for c in streamed)
+    # Every element survives, even those split across buffer windows.
+    joined = "\n".join(streamed)
+    assert all(f"paragraph {i} " in joined for i in range(200))
+    assert abs(len(streamed) - len(_chunks("\n".join(elements)))) <= len(streamed) // 10
@@ -0,0 +1,71 @@
+import uuid
+
+import pytest
+
+pytestmark = pytest.mark.slow
+
+pytest.importorskip("qdrant_client")
+
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client.models import Distance, VectorParams  # noqa: E402
+
+from helpdesk_ai.collection import (  # noqa: E402
+    SPARSE_CONFIG,
+    ensure_collection,
+    migrate_collection,
+)
+from helpdesk_ai.llm.embedding_models import EmbeddingModel  # noqa: E402
+
+MODEL = EmbeddingModel("test-embed", 4)
+
+
+def test_legacy_collection_is_migrated():
+    client = QdrantClient(url="http://localhost:6333")
+    name = f"legacy_{uuid.uuid4().hex[:8]}"
+    client.create_collection(
+        name,
+        vectors_config=VectorParams(size=4, distance=Distance.COSINE),
+        sparse_vectors_config=SPARSE_CONFIG,
+    )
+    try:
+        assert not ensure_collection(client, name, quantization="scalar", on_disk=True)
+        info = client.get_collection(name)
+        assert info.payload_schema["tenant_id"].params.is_tenant
+        assert "doc_id" in info.payload_schema
+        assert info.config.hnsw_config.payload_m == 16
+        assert info.config.quantization_config is not None
+        assert info.config.params.vectors.on_disk
+        assert (
+            migrate_collection(client, name, quantization="scalar", on_disk=True)
+            is False
+        )
+    finally:
+        client.delete_collection(name)
+
+
+def test_collection_without_sparse_vectors_is_rebuilt():
+    client = QdrantClient(url="http://localhost:6333")
+    name = f"legacy_{uuid.uuid4().hex[:8]}"
+    client.create_collection(
+        name, vectors_config=VectorParams(size=4, distance=Distance.COSINE)
+    )
+    try:
+        with pytest.raises(ValueError, match="--full"):
+            ensure_collection(client, name, model=MODEL)
+        assert not client.get_collection(name).config.params.sparse_vectors
+        assert ensure_collection(client, name, model=MODEL, recreate=True)
+        assert "bm25" in client.get_collection(name).config.params.sparse_vectors
+        assert not ensure_collection(client, name, model=MODEL)
+    finally:
+        client.delete_collection(name)
+
+
+def test_vector_size_mismatch_is_refused():
+    client = QdrantClient(url="http://localhost:6333")
+    name = f"legacy_{uuid.uuid4().hex[:8]}"
+    ensure_collection(client, name, model=MODEL)
+    try:
+        with pytest.raises(ValueError, match="4-dim"):
+            ensure_collection(client, name, model=EmbeddingModel("other", 8))
+    finally:
+        client.delete_collection(name)
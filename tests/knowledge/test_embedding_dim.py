@@ -4,11 +4,12 @@ pytestmark = pytest.mark.slow
 
 pytest.importorskip("httpx")
 
+from helpdesk_ai.llm.embedding_models import EMBEDDING_MODEL  # noqa: E402
 from helpdesk_ai.llm.ollama_client import OllamaClient  # noqa: E402
 
 
 def test_embedding_dimension():
     client = OllamaClient()
     vec = client.embed("hello world")
-    # The llama3 model uses an embedding size of 4096
-    assert len(vec) == 4096
+    # The collection is sized from the configured model, so they must agree.
+    assert len(vec) == EMBEDDING_MODEL.dimensions
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import uuid
+from pathlib import Path
+
+import pytest
+
+pytestmark = pytest.mark.slow
+
+pytest.importorskip("qdrant_client")
+pytest.importorskip("httpx")
+
+from sqlalchemy import create_engine, delete  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from helpdesk_ai import vector_store  # noqa: E402
+from helpdesk_ai.models import Tenant  # noqa: E402
+from scripts.load_docs import DATABASE_URL, load_manifest  # noqa: E402
+
+
+def test_reingest_unchanged_corpus_is_skipped():
+    seed = json.load(open("scripts/seed_manifest.json"))
+    manifest = Path("scripts/demo_docs.json")
+    load_manifest(manifest, seed["tenants"])
+    summary = load_manifest(manifest, seed["tenants"])
+    assert summary.added == summary.updated == summary.deleted == 0
+    assert summary.skipped == len(json.load(open(manifest)))
+    assert summary.vectors == 0
+
+
+@pytest.fixture
+def tenant():
+    engine = create_engine(DATABASE_URL)
+    tenant_id = uuid.uuid4()
+    with Session(engine) as session:
+        session.add(Tenant(id=tenant_id, name="Store state"))
+        session.commit()
+    yield str(tenant_id)
+    with Session(engine) as session:
+        session.execute(delete(Tenant).where(Tenant.id == tenant_id))
+        session.commit()
+    engine.dispose()
+
+
+def test_each_store_keeps_its_own_ingest_state(tmp_path, monkeypatch, tenant):
+    monkeypatch.setattr(vector_store, "LOCAL_INDEX_DIR", tmp_path / "index")
+    doc = tmp_path / "vpn.md"
+    doc.write_text("Restart the router when the VPN drops.")
+    manifest = tmp_path / "manifest.json"
+
+    def load(store: str, docs: list[Path]):
+        entries = [{"tenant": "t", "path": str(path)} for path in docs]
+        manifest.write_text(json.dumps(entries))
+        return load_manifest(manifest, {"t": tenant}, store=store)
+
+    try:
+        load("local", [doc])
+        load("qdrant", [doc])
+        doc.write_text("Reboot the modem when the VPN drops.")
+        assert load("qdrant", [doc]).updated == 1
+        # knowledge_doc now records the new version; the local store still
+        # holds the old one and must not skip the document.
+        summary = load("local", [doc])
+        assert (summary.updated, summary.skipped) == (1, 0)
+        assert load("local", [doc]).skipped == 1
+    finally:
+        for store in ("qdrant", "local"):
+            load(store, [])
+
+
+def test_files_that_swap_contents_are_both_updated(tmp_path, monkeypatch, tenant):
+    monkeypatch.setattr(vector_store, "LOCAL_INDEX_DIR", tmp_path / "index")
+    first, second = tmp_path / "vpn.md", tmp_path / "password.md"
+    first.write_text("Restart the router when the VPN drops.")
+    second.write_text("Reset your password from the account page.")
+    manifest = tmp_path / "manifest.json"
+
+    def load(docs: list[Path]):
+        entries = [{"tenant": "t", "path": str(path)} for path in docs]
+        manifest.write_text(json.dumps(entries))
+        return load_manifest(manifest, {"t": tenant}, store="local")
+
+    try:
+        load([first, second])
+        texts = first.read_text(), second.read_text()
+        first.write_text(texts[1])
+        second.write_text(texts[0])
+        assert load([first, second]).updated == 2
+        with vector_store.open_store("local") as store:
+            hits = store.search([1.0] * store.model.dimensions, tenant, limit=10)
+        # Neither file's chunks were deleted as the other's old version.
+        assert {hit.doc_id for hit in hits} == {
+            hashlib.sha256(path.read_bytes()).hexdigest() for path in (first, second)
+        }
+        assert load([first, second]).skipped == 2
+    finally:
+        load([])
@@ -0,0 +1,94 @@
+import uuid
+
+import numpy as np
+import pytest
+
+from helpdesk_ai.llm.embedding_models import EmbeddingModel
+from helpdesk_ai.local_index import TenantIndex, top_k
+from helpdesk_ai.vector_store import DocRef, LocalStore
+
+DIM = 16
+
+
+def _unit(rng: np.random.Generator, n: int) -> np.ndarray:
+    x = rng.standard_normal((n, DIM)).astype(np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def test_top_k_orders_best_first():
+    scores = np.array([[0.1, 0.9, 0.5, 0.7], [3.0, 1.0, 2.0, 0.0]])
+    assert top_k(scores, 2).tolist() == [[1, 3], [0, 2]]
+    assert top_k(scores, 10).tolist() == [[1, 3, 2, 0], [0, 2, 1, 3]]
+
+
+def test_exact_search_matches_brute_force_across_blocks(tmp_path, monkeypatch):
+    monkeypatch.setattr("helpdesk_ai.local_index.BLOCK_ROWS", 64)
+    rng = np.random.default_rng(1)
+    data, queries = _unit(rng, 300), _unit(rng, 7)
+    index = TenantIndex(tmp_path, DIM)
+    for start in range(0, 300, 100):
+        chunk = data[start : start + 100]
+        index.append("doc", start, ["x"] * len(chunk), chunk)
+    found = index.search(queries, 5)
+    expected = top_k(queries @ data.T, 5)
+    assert [[row for row, _ in hits] for hits in found] == expected.tolist()
+    assert found[0][0][1] == pytest.approx(float(queries[0] @ data[expected[0, 0]]))
+
+
+def test_persists_appends_and_deletes(tmp_path):
+    rng = np.random.default_rng(2)
+    index = TenantIndex(tmp_path, DIM)
+    index.append("a", 0, ["a0", "a1"], _unit(rng, 2))
+    index.append("b", 0, ["b0"], _unit(rng, 1))
+    assert index.delete("a") == 2
+
+    reopened = TenantIndex(tmp_path, DIM)
+    assert reopened.rows == [("b", 0, "b0")]
+    reopened.append("c", 0, ["c0"], _unit(rng, 1))
+    # A vector written without its row (an interrupted append) is dropped.
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(_unit(rng, 1).tobytes())
+    assert [row[0] for row in TenantIndex(tmp_path, DIM).rows] == ["b", "c"]
+
+
+def test_ivf_finds_the_nearest_neighbours(tmp_path):
+    rng = np.random.default_rng(3)
+    centres = _unit(rng, 20)
+    data = np.repeat(centres, 100, axis=0) + 0.05 * _unit(rng, 2000)
+    index = TenantIndex(tmp_path, DIM, ivf_min_rows=1000, nprobe=8)
+    index.append("doc", 0, ["x"] * len(data), data)
+    index.maintain()
+    assert (tmp_path / "ivf.npz").exists()
+
+    queries = centres[:5] + 0.05 * _unit(rng, 5)
+    normed = data / np.linalg.norm(data, axis=1, keepdims=True)
+    exact = top_k(queries @ normed.T, 10)
+    found = TenantIndex(tmp_path, DIM, ivf_min_rows=1000, nprobe=8).search(queries, 10)
+    recall = np.mean(
+        [len({r for r, _ in hits} & set(e)) / 10 for hits, e in zip(found, exact)]
+    )
+    assert recall >= 0.9
+
+
+def test_local_store_keeps_tenants_apart(tmp_path):
+    model = EmbeddingModel("local-test", DIM)
+    t1, t2 = str(uuid.uuid4()), str(uuid.uuid4())
+    vector = _unit(np.random.default_rng(4), 1)[0]
+    with LocalStore(tmp_path, model) as store:
+        assert store.ensure()
+        store.write(DocRef(t1, "aaa"), 0, ["reset the password"], [vector])
+        assert store.barrier() == set()
+        (hit,) = store.search(vector, t1, limit=5)
+        assert (hit.doc_id, hit.chunk_index, hit.text) == (
+            "aaa",
+            0,
+            "reset the password",
+        )
+        assert hit.score == pytest.approx(1.0)
+        assert store.search(vector, t2) == []
+        assert store.current(t1, {"aaa", "bbb"}) == {"aaa"}
+        assert store.current(t2, {"aaa"}) == set()
+        store.delete(DocRef(t1, "aaa"))
+        assert store.search(vector, t1) == []
+        assert store.current(t1, {"aaa"}) == set()
+    assert not LocalStore(tmp_path, model).ensure()
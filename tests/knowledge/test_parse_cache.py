@@ -0,0 +1,34 @@
+import pytest
+
+from helpdesk_ai.parse_cache import ParseCache
+
+
+def test_round_trip_in_batches(tmp_path):
+    cache = ParseCache(tmp_path, version="test")
+    assert cache.read("ab" * 32) is None
+    with cache.writer("ab" * 32) as out:
+        out.write(["first", "zweite ü"])
+        out.write(["third"])
+    batches = list(cache.read("ab" * 32, batch=2))
+    assert batches == [["first", "zweite ü"], ["third"]]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_interrupted_write_leaves_no_entry(tmp_path):
+    cache = ParseCache(tmp_path, version="test")
+    with pytest.raises(RuntimeError):
+        with cache.writer("cd" * 32) as out:
+            out.write(["partial"])
+            raise RuntimeError("parser crashed")
+    assert cache.read("cd" * 32) is None
+
+
+def test_prune_other_versions_and_unlisted(tmp_path):
+    old = ParseCache(tmp_path, version="old")
+    new = ParseCache(tmp_path, version="new")
+    for cache, checksum in ((old, "aa" * 32), (new, "bb" * 32), (new, "cc" * 32)):
+        with cache.writer(checksum) as out:
+            out.write(["x"])
+    assert new.prune(keep={"bb" * 32}) == 2
+    assert new.read("bb" * 32) is not None
+    assert new.read("cc" * 32) is None
@@ -10,7 +10,8 @@ pytest.importorskip("httpx")
 
 from qdrant_client import QdrantClient  # noqa: E402
 
-from scripts.load_docs import DEFAULT_COLLECTION, load_manifest  # noqa: E402
+from helpdesk_ai.collection import DEFAULT_COLLECTION  # noqa: E402
+from scripts.load_docs import load_manifest  # noqa: E402
 
 
 def test_qdrant_insert(tmp_path):
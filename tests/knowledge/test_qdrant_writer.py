@@ -0,0 +1,71 @@
+import time
+
+import pytest
+
+pytest.importorskip("qdrant_client")
+
+from httpx import Headers  # noqa: E402
+from qdrant_client import QdrantClient  # noqa: E402
+from qdrant_client.http.exceptions import UnexpectedResponse  # noqa: E402
+from qdrant_client.models import Distance, PointStruct, VectorParams  # noqa: E402
+
+from helpdesk_ai.qdrant_writer import (  # noqa: E402
+    MAX_ATTEMPTS,
+    PointWriter,
+    point_size,
+)
+
+
+def _points(owner: int, n: int) -> list[PointStruct]:
+    return [
+        PointStruct(id=owner * 100 + i, vector=[0.1] * 8, payload={"text": "x" * 50})
+        for i in range(n)
+    ]
+
+
+def test_batches_by_count_and_bytes():
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        "docs", vectors_config=VectorParams(size=8, distance=Distance.COSINE)
+    )
+    max_bytes = point_size(_points(0, 1)[0]) * 3
+    # Local mode is not safe for concurrent upserts, so send one at a time.
+    with PointWriter(
+        client, "docs", max_points=5, max_bytes=max_bytes, parallel=1
+    ) as writer:
+        writer.write(_points(1, 4), owner=1)
+        writer.write(_points(2, 4), owner=2)
+        assert writer.barrier() == set()
+    assert client.count("docs", exact=True).count == 8
+    # 8 points at 3 per batch, plus the final wait=True barrier.
+    assert writer.stats.batches == 4
+
+
+class _Unavailable:
+    """A client whose upserts always answer 503."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def upsert(self, **kwargs: object) -> None:
+        self.calls += 1
+        raise UnexpectedResponse(503, "Service Unavailable", b"", Headers())
+
+
+def test_failed_batches_report_owners(monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda s: None)
+    client = _Unavailable()
+    with PointWriter(client, "docs", max_points=2, wait=True) as writer:
+        writer.write(_points(1, 2), owner="a")
+        assert writer.barrier() == {"a"}
+    assert writer.stats.failed_batches == 1
+    assert client.calls == MAX_ATTEMPTS
+
+
+def test_bad_requests_are_raised_without_retry():
+    client = QdrantClient(":memory:")
+    with PointWriter(client, "missing", max_points=2, wait=True) as writer:
+        writer.write(_points(1, 2), owner="a")
+        with pytest.raises(ValueError):
+            writer.barrier()
+    assert writer.stats.retries == 0
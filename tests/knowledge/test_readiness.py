@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+import httpx  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from helpdesk_ai import knowledge  # noqa: E402
+from helpdesk_ai.readiness import ReadinessProbe  # noqa: E402
+
+TARGETS = {"qdrant": "http://qdrant/readyz", "ollama": "http://ollama/"}
+
+
+def _probe(handler, ttl: float = 60) -> ReadinessProbe:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return ReadinessProbe(client, TARGETS, ttl=ttl)
+
+
+def test_concurrent_checks_share_one_probe():
+    calls = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.host)
+        await asyncio.sleep(0.05)
+        return httpx.Response(200)
+
+    probe = _probe(handler)
+
+    async def run():
+        results = await asyncio.gather(*(probe.check() for _ in range(20)))
+        results.append(await probe.check())
+        return results
+
+    results = asyncio.run(run())
+    assert all(r == {"qdrant": True, "ollama": True} for r in results)
+    assert sorted(calls) == ["ollama", "qdrant"]
+    assert probe.probes == 1
+
+
+def test_ready_reports_unavailable_backend():
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "ollama":
+            raise httpx.ConnectError("refused")
+        return httpx.Response(200)
+
+    knowledge.app.dependency_overrides = {
+        knowledge.get_readiness: lambda: _probe(handler, ttl=0)
+    }
+    try:
+        client = TestClient(knowledge.app)
+        resp = client.get("/knowledge/ready")
+        live = client.get("/knowledge/live")
+    finally:
+        knowledge.app.dependency_overrides = {}
+    assert resp.status_code == 503
+    assert "ollama" in resp.json()["detail"]
+    assert live.status_code == 200
@@ -3,43 +3,27 @@ from pathlib import Path
 
 import pytest
 
-pytestmark = pytest.mark.slow
-
 pytest.importorskip("qdrant_client")
 pytest.importorskip("httpx")
 
-from qdrant_client import QdrantClient  # noqa: E402
-from qdrant_client.http import models as rest  # noqa: E402
-
-from helpdesk_ai.llm.ollama_client import OllamaClient  # noqa: E402
-from scripts.load_docs import DEFAULT_COLLECTION, load_manifest  # noqa: E402
+from scripts.load_docs import _sha256  # noqa: E402
 
 DATA = json.load(open(Path(__file__).parent / "qa_pairs.json"))
 
 
-def test_recall_at_5():
+def test_recall_at_5(loaded_store, embed_query):
     seed = json.load(open("scripts/seed_manifest.json"))
-    load_manifest(Path("scripts/demo_docs.json"), seed["tenants"])
-    client = QdrantClient(url="http://localhost:6333")
+    tenants = {
+        Path(entry["path"]).name: seed["tenants"][entry["tenant"]]
+        for entry in json.load(open("scripts/demo_docs.json"))
+    }
     hits = 0
     for pair in DATA:
-        doc_path = pair["doc"]
+        checksum = _sha256(Path("docs/sample_docs") / pair["doc"])
         query = pair["question"]
-        vec = OllamaClient().embed(query)
-        result = client.search(
-            collection_name=DEFAULT_COLLECTION,
-            query_vector=vec,
-            query_filter=rest.Filter(
-                must=[
-                    rest.FieldCondition(
-                        key="tenant_id",
-                        match=rest.MatchValue(value=list(seed["tenants"].values())[0]),
-                    )
-                ]
-            ),
-            limit=5,
-        )
-        if any(doc_path in p.payload.get("text", "") for p in result):
+        vec = embed_query(query)
+        result = loaded_store.search(vec, tenants[pair["doc"]], text=query, limit=5)
+        if any(hit.doc_id == checksum for hit in result):
             hits += 1
     recall = hits / len(DATA)
     assert recall >= 0.8
@@ -0,0 +1,143 @@
+import asyncio
+import uuid
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("qdrant_client")
+pytest.importorskip("httpx")
+
+import httpx  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from qdrant_client import AsyncQdrantClient  # noqa: E402
+from qdrant_client.models import Distance, PointStruct, VectorParams  # noqa: E402
+
+from helpdesk_ai import knowledge  # noqa: E402
+from helpdesk_ai.collection import (  # noqa: E402
+    DEFAULT_COLLECTION,
+    SPARSE_CONFIG,
+    SPARSE_VECTOR,
+    VECTOR_SIZE,
+)
+from helpdesk_ai.lexical import document_vector  # noqa: E402
+from helpdesk_ai.llm.backends import BackendsUnavailable  # noqa: E402
+from helpdesk_ai.llm.embedding_cache import EmbeddingCache  # noqa: E402
+from helpdesk_ai.llm.ollama_client import AsyncOllamaClient  # noqa: E402
+
+TEXTS = [
+    "Reset your password from the account page.",
+    "Error 0x80070005 means the installer lacks admin rights.",
+    "Reset your password from the account page.",
+]
+
+
+def _vector(axis: int) -> list[float]:
+    vec = [0.0] * VECTOR_SIZE
+    vec[axis] = 1.0
+    return vec
+
+
+@pytest.fixture
+def api():
+    tenant, other = str(uuid.uuid4()), str(uuid.uuid4())
+    qdrant = AsyncQdrantClient(":memory:")
+    embed_calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        embed_calls.append(request)
+        return httpx.Response(200, json={"embeddings": [_vector(0)]})
+
+    embedder = AsyncOllamaClient(
+        "http://ollama/api",
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        cache=EmbeddingCache(memory_items=8),
+    )
+
+    async def seed() -> None:
+        await qdrant.create_collection(
+            DEFAULT_COLLECTION,
+            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+            sparse_vectors_config=SPARSE_CONFIG,
+        )
+        await qdrant.upsert(
+            DEFAULT_COLLECTION,
+            points=[
+                PointStruct(
+                    id=i,
+                    vector={"": _vector(i), SPARSE_VECTOR: document_vector(text)},
+                    payload={
+                        "tenant_id": tenant_id,
+                        "doc_id": f"doc-{i}",
+                        "chunk_index": 0,
+                        "text": text,
+                    },
+                )
+                for i, (tenant_id, text) in enumerate(
+                    zip([tenant, tenant, other], TEXTS)
+                )
+            ],
+        )
+
+    asyncio.run(seed())
+    knowledge.app.dependency_overrides = {
+        knowledge.get_qdrant: lambda: qdrant,
+        knowledge.get_embedder: lambda: embedder,
+    }
+    # Not entered as a context manager, so the lifespan's real clients are
+    # never created.
+    yield TestClient(knowledge.app), tenant, embed_calls
+    knowledge.app.dependency_overrides = {}
+
+
+def test_search_filters_tenant_and_caches_query(api):
+    client, tenant, embed_calls = api
+    body = {"tenant_id": tenant, "query": "how do I sign in?", "top_k": 5}
+    first = client.post("/knowledge/search", json=body)
+    second = client.post("/knowledge/search", json=body)
+
+    assert first.status_code == 200
+    hits = first.json()["hits"]
+    assert [h["doc_id"] for h in hits] == ["doc-0", "doc-1"]
+    assert first.headers["X-Retrieval"] == "hybrid"
+    assert "embed;dur=" in first.headers["Server-Timing"]
+    assert second.json() == first.json()
+    assert len(embed_calls) == 1
+
+
+def test_strong_lexical_match_skips_embedding(api):
+    client, tenant, embed_calls = api
+    body = {"tenant_id": tenant, "query": "error 0x80070005"}
+    resp = client.post("/knowledge/search", json=body)
+
+    assert resp.headers["X-Retrieval"] == "lexical"
+    assert resp.json()["hits"][0]["doc_id"] == "doc-1"
+    assert embed_calls == []
+
+
+def test_lexical_mode_rejects_query_without_terms(api):
+    client, tenant, embed_calls = api
+    body = {"tenant_id": tenant, "query": "?!", "mode": "lexical"}
+    resp = client.post("/knowledge/search", json=body)
+
+    assert resp.status_code == 422
+    assert embed_calls == []
+
+
+def test_unavailable_backends_answer_503(api):
+    client, tenant, _ = api
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise BackendsUnavailable(12.5)
+
+    knowledge.app.dependency_overrides[knowledge.get_embedder] = lambda: (
+        AsyncOllamaClient(
+            "http://ollama/api",
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            use_cache=False,
+        )
+    )
+    body = {"tenant_id": tenant, "query": "how do I sign in?", "mode": "dense"}
+    resp = client.post("/knowledge/search", json=body)
+
+    assert resp.status_code == 503
+    assert resp.headers["Retry-After"] == "13"
@@ -0,0 +1,38 @@
+import pytest
+
+pytest.importorskip("qdrant_client")
+
+from qdrant_client import QdrantClient  # noqa: E402
+
+from helpdesk_ai.llm.embedding_models import EmbeddingModel  # noqa: E402
+from helpdesk_ai.vector_store import DocRef, QdrantStore, open_store  # noqa: E402
+
+pytestmark = pytest.mark.filterwarnings("ignore:.*[Ll]ocal:UserWarning")
+
+MODEL = EmbeddingModel("store-test", 4)
+
+
+def test_qdrant_store_round_trip():
+    with QdrantStore(QdrantClient(":memory:"), MODEL, wait=True) as store:
+        assert store.ensure()
+        a, b = DocRef("t1", "aaa"), DocRef("t2", "bbb")
+        store.write(a, 0, ["reset the password", "install vpn"], [[1, 0, 0, 0]] * 2)
+        store.write(b, 0, ["reset the password"], [[1, 0, 0, 0]])
+        assert store.barrier() == set()
+
+        hits = store.search([1, 0, 0, 0], "t1", text="password", limit=5)
+        assert [(h.doc_id, h.chunk_index) for h in hits] == [("aaa", 0), ("aaa", 1)]
+        assert hits[0].text == "reset the password"
+        assert store.current("t1", {"aaa", "bbb"}) == {"aaa"}
+
+        store.delete(a)
+        assert store.search([1, 0, 0, 0], "t1") == []
+        assert store.current("t1", {"aaa"}) == set()
+        assert [h.doc_id for h in store.search([1, 0, 0, 0], "t2")] == ["bbb"]
+
+
+def test_open_store_validates_kind():
+    with pytest.raises(ValueError):
+        open_store("pgvector", MODEL)
+    with pytest.raises(ValueError):
+        open_store("faiss", MODEL)
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from helpdesk_ai.llm.answer_cache import AnswerCache  # noqa: E402
+
+RESET = [1.0, 0.0, 0.0]
+RESET_REPHRASED = [0.98, 0.2, 0.0]
+VPN = [0.0, 0.0, 1.0]
+
+
+def test_similar_question_reuses_answer_per_tenant():
+    cache = AnswerCache(threshold=0.9)
+    cache.put("t1", "How do I reset my password?", RESET, "Use the portal.", ["a"])
+
+    hit = cache.get("t1", RESET_REPHRASED)
+    assert hit is not None and hit.answer == "Use the portal."
+    assert cache.get("t1", VPN) is None
+    assert cache.get("t2", RESET) is None
+    assert cache.stats.hits == 1 and cache.stats.misses == 2
+
+
+def test_changed_source_invalidates_answer():
+    cache = AnswerCache(threshold=0.9)
+    cache.put("t1", "reset", RESET, "old answer", ["a", "b"])
+    cache.put("t1", "other", VPN, "unrelated", ["c"])
+
+    async def check(tenant_id: str, checksums: set[str]) -> set[str]:
+        return checksums - {"b"}
+
+    assert asyncio.run(cache.lookup("t1", RESET, check)) is None
+    assert cache.stats.stale == 1
+    assert len(cache) == 1
+    assert asyncio.run(cache.lookup("t1", VPN, check)).answer == "unrelated"
+
+
+def test_ttl_and_size_eviction():
+    cache = AnswerCache(ttl=0.0, max_entries=2)
+    cache.put("t1", "reset", RESET, "x", [])
+    assert cache.get("t1", RESET) is None
+    assert cache.stats.expired == 1
+
+    cache = AnswerCache(max_entries=2)
+    for tenant in ["t1", "t2", "t3"]:
+        cache.put(tenant, "reset", RESET, tenant, [])
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+    assert cache.get("t1", RESET) is None
+
+
+def test_per_tenant_eviction_keeps_recently_hit_answers():
+    cache = AnswerCache(threshold=0.9, max_per_tenant=2)
+    cache.put("t1", "reset", RESET, "reset answer", [])
+    cache.put("t1", "vpn", VPN, "vpn answer", [])
+    assert cache.get("t1", RESET) is not None
+    cache.put("t1", "printer", [0.0, 1.0, 0.0], "printer answer", [])
+
+    assert cache.stats.evictions == 1
+    assert cache.get("t1", RESET).answer == "reset answer"
+    assert cache.get("t1", VPN) is None
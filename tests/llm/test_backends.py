@@ -0,0 +1,122 @@
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip("httpx")
+
+import httpx  # noqa: E402
+
+from helpdesk_ai.llm.backends import BackendPool, BackendsUnavailable  # noqa: E402
+from helpdesk_ai.llm import ollama_client  # noqa: E402
+from helpdesk_ai.llm.ollama_client import AsyncOllamaClient  # noqa: E402
+
+DOWN = httpx.ConnectError("connection refused")
+
+
+def test_least_outstanding_then_warm_backend():
+    pool = BackendPool(["http://a", "http://b", "http://c"])
+    with pool.lease("llama3") as first, pool.lease("llama3") as second:
+        assert first.url != second.url
+    # Both idle again; the warm backend wins over the never-used one.
+    assert pool.acquire("llama3").url in {first.url, second.url}
+    assert pool.acquire("nomic-embed-text").url == "http://c"
+
+
+def test_warm_backend_yields_when_overloaded():
+    pool = BackendPool(["http://a", "http://b"])
+    with pool.lease("llama3"):
+        pass
+    busy = [pool.acquire("llama3") for _ in range(2)]
+    assert [b.url for b in busy] == ["http://a", "http://a"]
+    assert pool.acquire("llama3").url == "http://b"
+
+
+def test_eject_fail_fast_and_readmit():
+    pool = BackendPool(["http://a"], eject_after=2, eject_base=0.05)
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError), pool.lease("m"):
+            raise DOWN
+    with pytest.raises(BackendsUnavailable):
+        pool.acquire("m")
+
+    time.sleep(0.06)
+    trial = pool.acquire("m")
+    # Only one trial request while half-open.
+    with pytest.raises(BackendsUnavailable):
+        pool.acquire("m")
+    pool.release(trial, "m", DOWN)
+    # The failed trial ejects it again, for twice as long.
+    time.sleep(0.06)
+    with pytest.raises(BackendsUnavailable):
+        pool.acquire("m")
+    time.sleep(0.05)
+    with pool.lease("m"):
+        pass
+    backend = pool.backends[0]
+    assert (backend.ejected_until, backend.ejections, backend.outstanding) == (0, 0, 0)
+
+
+def test_client_routes_around_a_dead_backend():
+    seen = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.host)
+        await asyncio.sleep(0.01)
+        if request.url.host == "dead":
+            raise DOWN
+        return httpx.Response(200, json={"response": "ok"})
+
+    client = AsyncOllamaClient(
+        ["http://dead/api", "http://alive/api"],
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        use_cache=False,
+    )
+
+    async def run() -> list[str]:
+        return await asyncio.gather(
+            *(client.generate(f"q{i}", model="m") for i in range(6))
+        )
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    # Requests are spread over both; those sent to the dead backend are
+    # retried on the other one, and it is ejected after EJECT_AFTER failures.
+    assert seen.count("dead") == 3
+    assert seen.count("alive") == 6
+    dead = client.backends.backends[0]
+    assert dead.ejected_until > 0
+
+    seen.clear()
+    client.backends.backends[1].ejected_until = time.monotonic() + 60
+    with pytest.raises(BackendsUnavailable):
+        asyncio.run(client.generate("q", model="m"))
+    assert seen == []
+
+
+def test_concurrency_cap_is_shared_by_every_client(monkeypatch):
+    monkeypatch.setattr(ollama_client, "MAX_CONCURRENCY_PER_MODEL", 2)
+    in_flight, peak = 0, 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.02)
+        in_flight -= 1
+        return httpx.Response(200, json={"response": "ok"})
+
+    def client() -> AsyncOllamaClient:
+        return AsyncOllamaClient(
+            "http://ollama/api",
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            use_cache=False,
+        )
+
+    async def run() -> None:
+        clients = [client(), client()]
+        await asyncio.gather(
+            *(c.generate(f"q{i}", model="m") for c in clients for i in range(4))
+        )
+
+    asyncio.run(run())
+    assert peak == 2
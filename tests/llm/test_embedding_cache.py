@@ -0,0 +1,87 @@
+import asyncio
+import threading
+
+import pytest
+
+from helpdesk_ai.llm.embedding_cache import EmbeddingCache, cache_key, cache_path
+
+
+def test_key_normalizes_whitespace():
+    assert cache_key("llama3", " reset  password\n") == cache_key(
+        "llama3", "reset password"
+    )
+    assert cache_key("llama3", "x") != cache_key("nomic-embed-text", "x")
+
+
+def test_cache_path_is_opt_in(monkeypatch, tmp_path):
+    monkeypatch.delenv("EMBED_CACHE_PATH", raising=False)
+    assert cache_path() is None
+    assert cache_path(tmp_path / "e.sqlite") == tmp_path / "e.sqlite"
+    monkeypatch.setenv("EMBED_CACHE_PATH", "off")
+    assert cache_path(tmp_path / "e.sqlite") is None
+    monkeypatch.setenv("EMBED_CACHE_PATH", str(tmp_path / "other.sqlite"))
+    assert cache_path() == tmp_path / "other.sqlite"
+
+
+def test_memory_and_disk_tiers(tmp_path):
+    path = tmp_path / "embeddings.sqlite"
+    cache = EmbeddingCache(path, memory_items=1)
+    cache.put_many("llama3", ["a", "b"], [[1.0, 2.0], [3.0, 4.0]])
+    assert cache.get_many("llama3", ["b", "a", "c"]) == [
+        [3.0, 4.0],
+        [1.0, 2.0],
+        None,
+    ]
+    assert cache.stats.memory_hits == 1
+    assert cache.stats.disk_hits == 1
+    assert cache.stats.misses == 1
+    cache.close()
+
+    reopened = EmbeddingCache(path)
+    assert reopened.get_many("llama3", ["a"]) == [[1.0, 2.0]]
+
+
+def test_evict_by_size(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite", memory_items=0)
+    cache.put_many("llama3", ["a", "b", "c"], [[0.0] * 4] * 3)
+    assert cache.disk_bytes() == 48
+    assert cache.evict(32) == 1
+    assert cache.get_many("llama3", ["a", "b", "c"]).count(None) == 1
+
+
+def test_disk_size_is_tracked_across_writes(tmp_path):
+    path = tmp_path / "embeddings.sqlite"
+    cache = EmbeddingCache(path, memory_items=0)
+    cache.put_many("llama3", ["a", "b"], [[0.0] * 4] * 2)
+    cache.put_many("llama3", ["b", "c", "c"], [[1.0] * 4] * 3)
+    assert cache.disk_bytes() == 48
+    cache.close()
+    assert EmbeddingCache(path).disk_bytes() == 48
+
+
+def test_async_client_uses_disk_cache_off_the_loop(tmp_path):
+    httpx = pytest.importorskip("httpx")
+    from helpdesk_ai.llm.ollama_client import AsyncOllamaClient
+
+    cache = EmbeddingCache(tmp_path / "embeddings.sqlite")
+    threads = []
+    for name in ["get_many", "put_many"]:
+        method = getattr(cache, name)
+
+        def spy(*args, method=method):
+            threads.append(threading.get_ident())
+            return method(*args)
+
+        setattr(cache, name, spy)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"embeddings": [[1.0, 0.0]]})
+
+    client = AsyncOllamaClient(
+        "http://ollama/api",
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        cache=cache,
+    )
+    assert asyncio.run(client.embed("reset password", model="m")) == [1.0, 0.0]
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
@@ -0,0 +1,19 @@
+import pytest
+
+from helpdesk_ai.llm.embedding_models import EmbeddingModel, get_model
+
+
+def test_collection_is_derived_from_model():
+    nomic = get_model("nomic-embed-text:latest")
+    assert (nomic.collection, nomic.dimensions) == ("docs_nomic_embed_text", 768)
+    assert nomic.query("vpn") == "search_query: vpn"
+    # Existing deployments keep their collection name.
+    assert get_model("llama3").collection == "docs"
+
+
+def test_unknown_model_needs_dimensions(monkeypatch):
+    monkeypatch.delenv("EMBED_DIM", raising=False)
+    with pytest.raises(ValueError, match="EMBED_DIM"):
+        get_model("acme/embedder")
+    monkeypatch.setenv("EMBED_DIM", "512")
+    assert get_model("acme/embedder") == EmbeddingModel("acme/embedder", 512)
@@ -1,3 +1,4 @@
+import asyncio
 import subprocess
 import time
 from pathlib import Path
@@ -10,7 +11,9 @@ pytestmark = pytest.mark.slow
 pytest.importorskip("httpx")
 import httpx  # noqa: E402
 
-from helpdesk_ai.llm.ollama_client import OllamaClient  # noqa: E402
+from helpdesk_ai.llm import ollama_client  # noqa: E402
+from helpdesk_ai.llm.embedding_models import EMBEDDING_MODEL  # noqa: E402
+from helpdesk_ai.llm.ollama_client import AsyncOllamaClient, OllamaClient  # noqa: E402
 
 ROOT = Path(__file__).resolve().parents[2]
 INFRA = ROOT / "infra"
@@ -61,7 +64,7 @@ def test_generate(ollama_container):
 def test_embeddings(ollama_container):
     client = OllamaClient()
     vec = client.embed("hello world")
-    assert len(vec) == 4096
+    assert len(vec) == EMBEDDING_MODEL.dimensions
 
 
 def test_latency_budget(ollama_container, benchmark):
@@ -88,3 +91,48 @@ async def test_concurrent_generation(ollama_container):
 
     results = await anyio.gather(*[worker(i) for i in range(10)])
     assert all(results)
+
+
+@pytest.mark.anyio
+async def test_async_client(ollama_container):
+    client = AsyncOllamaClient()
+    assert (await client.status())["status"] == "ok"
+    vec = await client.embed("hello world")
+    assert len(vec) == EMBEDDING_MODEL.dimensions
+
+
+@pytest.mark.anyio
+async def test_async_client_bounded_concurrency(ollama_container, monkeypatch):
+    monkeypatch.setattr(ollama_client, "MAX_CONCURRENCY_PER_MODEL", 2)
+    client = AsyncOllamaClient()
+    results = await asyncio.gather(
+        *[client.generate(f"hi {i}", temperature=0) for i in range(6)]
+    )
+    assert all(results)
+
+
+def test_generate_stream(ollama_container):
+    client = OllamaClient()
+    with client.generate_stream("Count to five.") as stream:
+        tokens = list(stream)
+    assert "".join(tokens)
+    assert stream.stats.time_to_first_token is not None
+    assert stream.stats.tokens_per_second
+
+
+@pytest.mark.anyio
+async def test_async_generate_stream_cancel(ollama_container):
+    client = AsyncOllamaClient()
+    async with client.generate_stream("Write a long story.") as stream:
+        async for token in stream:
+            break
+    assert token
+    assert stream.stats.finished_at is None
+
+
+def test_embed_many(ollama_container):
+    client = OllamaClient()
+    texts = [f"sentence {i}" for i in range(5)]
+    vectors = client.embed_many(texts, batch_size=2)
+    assert len(vectors) == len(texts)
+    assert all(len(v) == EMBEDDING_MODEL.dimensions for v in vectors)
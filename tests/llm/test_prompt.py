@@ -0,0 +1,145 @@
+import json
+
+import pytest
+
+pytest.importorskip("httpx")
+
+import httpx  # noqa: E402
+
+from helpdesk_ai.llm.answer_cache import AnswerCache  # noqa: E402
+from helpdesk_ai.llm.ollama_client import OllamaClient  # noqa: E402
+from helpdesk_ai.llm.prompt import (  # noqa: E402
+    SYSTEM_PROMPT,
+    PromptBuilder,
+    estimate_tokens,
+)
+from helpdesk_ai.schemas import SearchHit  # noqa: E402
+
+# Consecutive chunks of one document, overlapping like load_docs' splitter.
+FIRST = "To reset a password open the account page and choose Security."
+SECOND = "choose Security. Then click Reset and follow the emailed link."
+
+
+def _hit(doc_id: str, index: int, text: str, score: float) -> SearchHit:
+    return SearchHit(doc_id=doc_id, chunk_index=index, text=text, score=score)
+
+
+def test_orders_by_score_and_drops_duplicates():
+    rag = PromptBuilder().build(
+        "How do I install the VPN?",
+        [
+            _hit("b", 0, "Install the VPN client from the portal.", 0.5),
+            _hit("a", 3, "The VPN needs admin rights on Windows.", 0.9),
+            _hit("c", 7, "Install the VPN client from the portal.", 0.4),
+        ],
+    )
+    assert rag.system == SYSTEM_PROMPT
+    assert rag.prompt.index("[1] (document a)") < rag.prompt.index("[2] (document b)")
+    assert "document c" not in rag.prompt
+    assert rag.sources == {"a", "b"}
+    assert rag.prompt.endswith("Question: How do I install the VPN?\nAnswer:")
+
+
+def test_joins_neighbouring_chunks_without_repeating_overlap():
+    rag = PromptBuilder().build(
+        "reset password",
+        [_hit("a", 1, SECOND, 0.7), _hit("a", 0, FIRST, 0.8)],
+    )
+    assert rag.prompt.count("choose Security.") == 1
+    assert "[1] (document a)\n" + FIRST + " Then click Reset" in rag.prompt
+    assert "[2]" not in rag.prompt
+
+
+def test_bridging_chunk_is_charged_for_the_merged_block():
+    middle = SECOND + " Pick a new password that you have not used before."
+    third = "not used before. The link expires after one hour."
+    hits = [_hit("a", 0, FIRST, 0.9), _hit("a", 2, third, 0.8)]
+    hits.append(_hit("a", 1, middle, 0.7))
+    merged = PromptBuilder().build("reset password", hits)
+    assert merged.prompt.count("[") == 1
+    context = merged.prompt.removeprefix("Context:\n").split("\n\nQuestion:")[0]
+
+    # The budget fits the joined passage exactly, not its three pieces with
+    # a header for each run.
+    rag = PromptBuilder(budget=estimate_tokens(context + "\n\n")).build(
+        "reset password", hits
+    )
+    assert rag.dropped == 0
+    assert rag.prompt == merged.prompt
+
+
+def test_packs_within_budget():
+    long = " ".join(["troubleshooting"] * 400)
+    hits = [
+        _hit("big", 0, long, 0.9),
+        _hit("small", 0, "Restart the router.", 0.8),
+    ]
+    builder = PromptBuilder(budget=100)
+    rag = builder.build("router?", hits)
+    assert rag.sources == {"small"}
+    assert rag.dropped == 1
+    assert rag.tokens <= 100 + estimate_tokens(SYSTEM_PROMPT) + 20
+
+    with pytest.raises(ValueError):
+        PromptBuilder(num_ctx=64).build("router?", hits)
+
+
+def test_generate_pins_context_and_keep_alive():
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, json={"response": "Open Security [1]."})
+
+    client = OllamaClient(
+        "http://prompt-test/api",
+        client=httpx.Client(transport=httpx.MockTransport(handler)),
+        use_cache=False,
+    )
+    builder = PromptBuilder(num_ctx=4096, keep_alive="1h")
+    rag = builder.build("reset password", [_hit("a", 0, FIRST, 0.8)])
+    assert builder.generate(client, rag) == "Open Security [1]."
+    (payload,) = sent
+    assert payload["system"] == SYSTEM_PROMPT
+    assert payload["keep_alive"] == "1h"
+    assert payload["options"] == {
+        "num_ctx": 4096,
+        "num_predict": 512,
+        "temperature": 0,
+    }
+
+
+def test_generate_reuses_cached_answer_while_sources_are_current():
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(json.loads(request.content))
+        return httpx.Response(200, json={"response": f"answer {len(sent)}"})
+
+    client = OllamaClient(
+        "http://prompt-cache-test/api",
+        client=httpx.Client(transport=httpx.MockTransport(handler)),
+        use_cache=False,
+    )
+    current = {"a"}
+    builder = PromptBuilder(
+        cache=AnswerCache(threshold=0.9),
+        check=lambda tenant_id, checksums: checksums & current,
+    )
+    rag = builder.build("reset password", [_hit("a", 0, FIRST, 0.8)])
+
+    assert builder.generate(client, rag, tenant_id="t1", vector=[1.0, 0.0]) == (
+        "answer 1"
+    )
+    assert builder.generate(client, rag, tenant_id="t1", vector=[0.98, 0.2]) == (
+        "answer 1"
+    )
+    assert builder.generate(client, rag, tenant_id="t2", vector=[1.0, 0.0]) == (
+        "answer 2"
+    )
+    current.clear()
+    assert builder.generate(client, rag, tenant_id="t1", vector=[1.0, 0.0]) == (
+        "answer 3"
+    )
+    assert builder.cache.stats.stale == 1
+    assert len(sent) == 3
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from helpdesk_ai.llm.scheduler import Priority, Scheduler, SchedulerBusy
+
+
+async def _drain(scheduler: Scheduler, requests: list[tuple[Priority, str]]) -> list:
+    """Queue ``requests`` behind one busy slot and record the service order."""
+    order = []
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with scheduler.aslot(Priority.BULK, "warmup"):
+            await release.wait()
+
+    async def one(priority: Priority, tenant_id: str) -> None:
+        async with scheduler.aslot(priority, tenant_id):
+            order.append((priority, tenant_id))
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiters = [asyncio.create_task(one(p, t)) for p, t in requests]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, *waiters)
+    return order
+
+
+def test_higher_priority_served_first():
+    order = asyncio.run(
+        _drain(
+            Scheduler(1),
+            [
+                (Priority.BULK, "a"),
+                (Priority.QUERY, "a"),
+                (Priority.INTERACTIVE, "a"),
+            ],
+        )
+    )
+    assert [p for p, _ in order] == [
+        Priority.INTERACTIVE,
+        Priority.QUERY,
+        Priority.BULK,
+    ]
+
+
+def test_tenants_share_a_class_fairly():
+    requests = [(Priority.BULK, "big")] * 4 + [(Priority.BULK, "small")] * 2
+    order = asyncio.run(_drain(Scheduler(1), requests))
+    assert [t for _, t in order] == ["big", "small", "big", "small", "big", "big"]
+
+
+def test_full_queue_rejects_with_retry_after():
+    scheduler = Scheduler(1, queue_limits={Priority.BULK: 1})
+
+    async def run() -> None:
+        async with scheduler.aslot(Priority.BULK):
+            waiter = asyncio.create_task(_enter(scheduler))
+            await asyncio.sleep(0)
+            with pytest.raises(SchedulerBusy) as exc:
+                async with scheduler.aslot(Priority.BULK):
+                    pass
+            assert exc.value.retry_after >= 1
+            assert scheduler.retry_after(Priority.BULK) == exc.value.retry_after
+            # Other classes have their own queues.
+            interactive = asyncio.create_task(_enter(scheduler, Priority.INTERACTIVE))
+            await asyncio.sleep(0)
+        await asyncio.gather(waiter, interactive)
+
+    asyncio.run(run())
+    stats = scheduler.stats[Priority.BULK]
+    assert (stats.admitted, stats.rejected, stats.waiting) == (2, 1, 0)
+    assert stats.max_wait > 0
+    assert scheduler.busy == 0
+
+
+def test_cancelled_waiter_gives_up_its_place():
+    scheduler = Scheduler(1)
+
+    async def run() -> None:
+        async with scheduler.aslot(Priority.QUERY):
+            waiter = asyncio.create_task(_enter(scheduler))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.sleep(0)
+        await _enter(scheduler)
+
+    asyncio.run(run())
+    assert scheduler.busy == 0
+    assert scheduler.stats[Priority.QUERY].waiting == 0
+
+
+async def _enter(scheduler: Scheduler, priority: Priority = Priority.BULK) -> None:
+    async with scheduler.aslot(priority):
+        await asyncio.sleep(0)
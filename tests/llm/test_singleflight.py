@@ -0,0 +1,125 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("httpx")
+
+import httpx  # noqa: E402
+
+from helpdesk_ai.llm.ollama_client import AsyncOllamaClient  # noqa: E402
+from helpdesk_ai.llm.singleflight import SingleFlight, coalescable  # noqa: E402
+
+TOKENS = ["Restart ", "the ", "router."]
+
+
+def _client(calls: list[dict]) -> AsyncOllamaClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        calls.append(payload)
+        # Hold the request open so concurrent callers overlap with it.
+        await asyncio.sleep(0.05)
+        if request.url.path.endswith("/embed"):
+            return httpx.Response(200, json={"embeddings": [[1.0, 0.0]]})
+        if payload["stream"]:
+            lines = [json.dumps({"response": t, "done": False}) for t in TOKENS]
+            lines.append(json.dumps({"response": "", "done": True}))
+            return httpx.Response(200, content="\n".join(lines).encode())
+        return httpx.Response(200, json={"response": "".join(TOKENS)})
+
+    return AsyncOllamaClient(
+        "http://ollama/api",
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        use_cache=False,
+    )
+
+
+def test_only_deterministic_requests_coalesce():
+    assert coalescable("/embed", {"model": "m", "input": ["x"]})
+    assert coalescable("/generate", {"options": {"temperature": 0}})
+    assert not coalescable("/generate", {"options": {"temperature": 0.7}})
+    assert not coalescable("/tags", None)
+
+
+def test_identical_requests_share_one_call():
+    calls = []
+    client = _client(calls)
+
+    async def run(temperature: float) -> list:
+        return await asyncio.gather(
+            *(client.embed("reset password") for _ in range(5)),
+            *(
+                client.generate("q", temperature=temperature, model="m")
+                for _ in range(3)
+            ),
+        )
+
+    results = asyncio.run(run(0))
+    assert results[:5] == [[1.0, 0.0]] * 5
+    assert results[5:] == ["Restart the router."] * 3
+    assert len(calls) == 2
+
+    calls.clear()
+    asyncio.run(run(0.7))
+    assert len(calls) == 1 + 3
+
+
+def test_stream_fans_out_to_every_waiter():
+    calls = []
+    client = _client(calls)
+
+    async def read() -> list[str]:
+        stream = client.generate_stream("q", temperature=0, model="m")
+        return [token async for token in stream]
+
+    async def run() -> list[list[str]]:
+        return await asyncio.gather(*(read() for _ in range(4)))
+
+    assert asyncio.run(run()) == [TOKENS] * 4
+    assert len(calls) == 1
+
+
+def test_sync_stream_survives_early_leaver():
+    flights = SingleFlight()
+    release = threading.Event()
+    opened = []
+
+    def source():
+        opened.append(1)
+        for token in TOKENS:
+            release.wait()
+            yield token
+
+    first = flights.stream("k", source)
+    second = flights.stream("k", source)
+    release.set()
+    assert next(first) == TOKENS[0]
+    first.close()
+    assert list(second) == TOKENS
+    assert opened == [1]
+    assert flights.coalesced == 1
+
+
+def test_sync_stream_cancelled_when_last_subscriber_leaves():
+    flights = SingleFlight()
+    hung_up = threading.Event()
+    closed = threading.Event()
+
+    def source():
+        try:
+            yield TOKENS[0]
+            # Blocks like a read on a quiet connection until it is cut off.
+            hung_up.wait()
+            raise ConnectionError("hung up")
+        finally:
+            closed.set()
+
+    first = flights.stream("k", source, hung_up.set)
+    second = flights.stream("k", source, hung_up.set)
+    assert next(first) == next(second) == TOKENS[0]
+    first.close()
+    assert not hung_up.is_set()
+    second.close()
+    assert hung_up.is_set()
+    assert closed.wait(1)
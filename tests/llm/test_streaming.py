@@ -0,0 +1,16 @@
+import time
+
+from helpdesk_ai.llm.streaming import TokenStream
+
+
+def test_time_to_first_token_starts_with_the_first_read():
+    def chunks():
+        yield {"response": "Restart ", "done": False}
+        yield {"response": "", "done": True, "eval_count": 1, "eval_duration": 10**9}
+
+    stream = TokenStream(chunks())
+    assert stream.stats.started is None
+    time.sleep(0.05)
+    assert stream.text() == "Restart "
+    assert stream.stats.time_to_first_token < 0.05
+    assert stream.stats.tokens_per_second == 1.0
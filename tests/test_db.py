@@ -0,0 +1,53 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+pytest.importorskip("greenlet")
+
+from sqlalchemy import create_engine, select  # noqa: E402
+
+from helpdesk_ai.db import TenantSession, async_url  # noqa: E402
+from helpdesk_ai.models import Base, Ticket  # noqa: E402
+
+NOW = datetime.now(timezone.utc)
+
+
+def _ticket(tenant_id: uuid.UUID | None, subject: str) -> Ticket:
+    return Ticket(
+        tenant_id=tenant_id,
+        owner_id=uuid.uuid4(),
+        status="open",
+        priority="low",
+        subject=subject,
+        body="",
+        created_at=NOW,
+    )
+
+
+def test_async_url_switches_postgres_driver():
+    assert async_url("postgresql+psycopg2://u:p@db:5432/x") == (
+        "postgresql+asyncpg://u:p@db:5432/x"
+    )
+    assert async_url("postgresql://u@db/x") == "postgresql+asyncpg://u@db/x"
+    assert async_url("sqlite://") == "sqlite://"
+
+
+def test_tenant_session_filters_and_assigns_rows():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[Ticket.__table__])
+    acme, globex = uuid.uuid4(), uuid.uuid4()
+    with TenantSession(engine) as session:
+        session.add_all([_ticket(acme, "vpn"), _ticket(globex, "printer")])
+        session.commit()
+
+    with TenantSession(engine, info={"tenant_id": acme}) as session:
+        assert session.scalars(select(Ticket.subject)).all() == ["vpn"]
+        assert [t.subject for t in session.scalars(select(Ticket))] == ["vpn"]
+        session.add(_ticket(None, "password"))
+        session.flush()
+        assert session.scalars(select(Ticket.tenant_id)).all() == [acme, acme]
+
+        session.add(_ticket(globex, "leak"))
+        with pytest.raises(ValueError):
+            session.flush()
@@ -0,0 +1,34 @@
+import struct
+
+import numpy as np
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql
+
+from helpdesk_ai.models import Embedding
+from helpdesk_ai.vector_types import from_wire, to_text
+
+
+def test_wire_format_decodes_without_copying():
+    data = struct.pack(">hh3f", 3, 0, 0.5, -1.0, 2.25)
+    vector = from_wire(data)
+    assert vector.tolist() == [0.5, -1.0, 2.25]
+    assert not vector.flags.owndata
+    assert np.dot(vector, vector) == pytest.approx(6.3125)
+
+
+def test_text_format_round_trips_float32():
+    values = np.array([0.1, 2, 1e-8], dtype=np.float32)
+    text = to_text(values)
+    assert text == "[0.1,2.0,1e-08]"
+    assert np.array_equal(np.array(text[1:-1].split(","), dtype=np.float32), values)
+    with pytest.raises(ValueError):
+        to_text([[1.0]])
+
+
+def test_column_reads_and_writes_through_pgvector_formats():
+    dialect = postgresql.dialect()
+    read = str(select(Embedding.vector).compile(dialect=dialect))
+    assert "vector_send(embedding.vector)" in read
+    write = insert(Embedding).values(vector=[1.0, 2.0]).compile(dialect=dialect)
+    assert "CAST(%(vector)s AS vector)" in str(write)